@@ -0,0 +1,626 @@
+# ai.py
+"""Противник-компьютер: стратегии выбора клетки для выстрела.
+
+Стратегия видит поле только через BoardView - неизменяемый снимок того,
+что известно стреляющему: shots, hits, sunk и halo. Расположение целых
+кораблей ей недоступно. Стратегии регистрируются по названию
+(register_strategy) и создаются через create_strategy уже обёрнутыми в
+TimedStrategy.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import BrokenExecutor, wait
+from typing import NamedTuple
+
+from bitboard import (
+    BOARD_SIZE, dilate, full_mask, iter_bits, mask_to_cells, popcount,
+    split_ships,
+)
+from fleet import QUICK_TRIES, SHIP_TYPES, placement_index
+
+# Время на один ход Монте-Карло ИИ, секунды
+MONTE_CARLO_BUDGET = 0.3
+# Как часто Монте-Карло ИИ проверяет отмену хода, секунды
+CANCEL_POLL_INTERVAL = 0.02
+# Запас до deadline на сложение частот со всех процессов, секунды
+MERGE_RESERVE = 0.05
+# Сколько случайных клеток пробует random_cell до полного перебора
+RANDOM_CELL_TRIES = 32
+
+
+class CancelToken:
+    """Флаг отмены хода ИИ, общий для потока GUI и рабочего потока."""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+class BoardView(NamedTuple):
+    """Неизменяемый снимок поля глазами стреляющего."""
+    size: int
+    shots: int
+    hits: int
+    sunk: int
+    halo: int
+
+    @property
+    def checked(self):
+        """Клетки, куда уже нет смысла стрелять."""
+        return self.shots | self.halo
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def is_shot(self, row, col):
+        return bool(self.checked >> (row * self.size + col) & 1)
+
+    def unshot_cells(self):
+        return mask_to_cells(full_mask(self.size) & ~self.checked, self.size)
+
+    def random_cell(self, rng=random, parity_class=None):
+        """Случайная непроверенная клетка (row, col) или None.
+
+        Пока поле почти пустое, случайная клетка почти всегда подходит -
+        сначала пробуем угадать, и только потом перебираем все клетки.
+        """
+        checked = self.checked
+        for _ in range(RANDOM_CELL_TRIES):
+            index = rng.randrange(self.size * self.size)
+            row, col = divmod(index, self.size)
+            if not checked >> index & 1 and (
+                    parity_class is None or (row + col) % 2 == parity_class):
+                return row, col
+        cells = [
+            (row, col) for row, col in self.unshot_cells()
+            if parity_class is None or (row + col) % 2 == parity_class
+        ]
+        return rng.choice(cells) if cells else None
+
+
+# ===== Стратегии =====
+
+# Зарегистрированные стратегии: название -> класс
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """Декоратор: регистрация класса стратегии под названием для настроек."""
+    def register(cls):
+        STRATEGIES[name] = cls
+        return cls
+    return register
+
+
+class Strategy:
+    """Базовая стратегия ИИ.
+
+    choose(view, token, deadline) возвращает (row, col) или None, если ход
+    отменён через token. deadline - момент по time.perf_counter(), к
+    которому нужно успеть; прервать поток извне нельзя, поэтому долгие
+    стратегии сами сверяются с ним. observe сообщает результат выстрела.
+    """
+
+    # Предельное время хода, секунды
+    time_limit = 0.05
+
+    def __init__(self, rng=random, ship_types=SHIP_TYPES):
+        self.rng = rng
+        self.ship_types = dict(ship_types)
+        self.reset()
+
+    def reset(self):
+        """Новая партия."""
+
+    def choose(self, view, token=None, deadline=None):
+        raise NotImplementedError
+
+    def observe(self, view, row, col, hit, sunk):
+        """Результат выстрела (halo вокруг потопленного уже помечено)."""
+
+    def shutdown(self):
+        """Освобождение ресурсов."""
+
+
+@register_strategy("Обычный")
+class ClassicAI(Strategy):
+    """Обычный ИИ: случайные выстрелы, после попадания - добивание."""
+
+    def reset(self):
+        self.ai_targets = []
+        self.current_target_hits = []
+        self.hunting_mode = False
+
+    def get_possible_directions(self, board, row, col):
+        """Получение возможных направлений для стрельбы."""
+        directions = []
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = row + dr, col + dc
+            if board.in_bounds(nr, nc) and not board.is_shot(nr, nc):
+                directions.append((nr, nc))
+        return directions
+
+    def get_ship_orientation(self):
+        """Определение ориентации корабля."""
+        if len(self.current_target_hits) < 2:
+            return None
+
+        sorted_hits = sorted(self.current_target_hits)
+        first_hit = sorted_hits[0]
+        second_hit = sorted_hits[1]
+
+        if first_hit[0] == second_hit[0]:
+            return "H"
+        elif first_hit[1] == second_hit[1]:
+            return "V"
+        return None
+
+    def get_targets_along_orientation(self, board, orientation):
+        """Получение целей вдоль ориентации корабля."""
+        targets = []
+
+        if orientation == "H":
+            min_col = min(hit[1] for hit in self.current_target_hits)
+            max_col = max(hit[1] for hit in self.current_target_hits)
+            row = self.current_target_hits[0][0]
+            ends = [(row, min_col - 1), (row, max_col + 1)]
+        elif orientation == "V":
+            min_row = min(hit[0] for hit in self.current_target_hits)
+            max_row = max(hit[0] for hit in self.current_target_hits)
+            col = self.current_target_hits[0][1]
+            ends = [(min_row - 1, col), (max_row + 1, col)]
+        else:
+            ends = []
+
+        for r, c in ends:
+            if board.in_bounds(r, c) and not board.is_shot(r, c):
+                targets.append((r, c))
+        return targets
+
+    def get_random_cell(self, board):
+        """Получение случайной клетки для выстрела."""
+        return board.random_cell(self.rng) or (0, 0)
+
+    def choose(self, board, token=None, deadline=None):
+        """Выбор клетки для выстрела."""
+        if self.hunting_mode and self.ai_targets:
+            return self.ai_targets.pop(0)
+
+        if self.hunting_mode:
+            orientation = self.get_ship_orientation()
+            if orientation:
+                self.ai_targets = self.get_targets_along_orientation(board, orientation)
+            else:
+                all_directions = []
+                for hit in self.current_target_hits:
+                    all_directions.extend(self.get_possible_directions(board, *hit))
+                self.ai_targets = list(set(all_directions))
+
+            if self.ai_targets:
+                return self.ai_targets.pop(0)
+            self.hunting_mode = False
+
+        return self.get_random_cell(board)
+
+    def observe(self, board, row, col, hit, sunk):
+        if not hit:
+            return
+
+        self.current_target_hits.append((row, col))
+        self.hunting_mode = True
+
+        orientation = self.get_ship_orientation()
+        if orientation:
+            self.ai_targets = self.get_targets_along_orientation(board, orientation)
+        else:
+            self.ai_targets.extend(self.get_possible_directions(board, row, col))
+        self.ai_targets = list(set(self.ai_targets))
+
+        if sunk:
+            self.current_target_hits.clear()
+            self.ai_targets.clear()
+            self.hunting_mode = False
+
+
+@register_strategy("Сложный")
+class DensityAI(Strategy):
+    """Сильный ИИ: стреляет в клетку, через которую проходит больше всего
+    возможных расстановок оставшихся кораблей.
+
+    Расстановки берутся из placement_index, каждая - битовая маска, так что
+    проверка согласованности с полем - пара операций над int. Вся карта
+    плотности считается заново каждый ход, поэтому состояния между ходами
+    нет.
+    """
+
+    def remaining_ships(self, board):
+        """Сколько кораблей каждой длины ещё не потоплено."""
+        remaining = dict(self.ship_types)
+        for ship in split_ships(board.sunk, board.size):
+            remaining[popcount(ship)] -= 1
+        return remaining
+
+    def heatmap(self, board):
+        """Число согласованных расстановок через каждую клетку."""
+        size = board.size
+        index = placement_index(size)
+        # Промахи, halo и окрестность потопленных кораблей заняты быть не могут
+        blocked = (board.shots & ~board.hits) | board.halo | dilate(board.sunk, size)
+        open_hits = board.hits & ~board.sunk
+
+        heat = [0] * (size * size)
+        for length, count in self.remaining_ships(board).items():
+            if count <= 0:
+                continue
+            for placement in index[length]:
+                mask = placement.mask
+                if mask & blocked:
+                    continue
+                if open_hits:
+                    # Добивание: корабль проходит через попадание и не
+                    # касается других раненых клеток
+                    if not mask & open_hits:
+                        continue
+                    if placement.exclusion & open_hits & ~mask:
+                        continue
+                for i in iter_bits(mask & ~board.shots):
+                    heat[i] += count
+        return heat
+
+    def choose(self, board, token=None, deadline=None):
+        """Выбор клетки с максимальной плотностью."""
+        heat = self.heatmap(board)
+        checked = board.checked
+        best, cells = 0, []
+        for i, value in enumerate(heat):
+            if value < best or checked >> i & 1:
+                continue
+            if value > best:
+                best, cells = value, []
+            cells.append(i)
+
+        if not best:
+            cells = list(iter_bits(full_mask(board.size) & ~checked))
+        if not cells:
+            return 0, 0
+        return divmod(self.rng.choice(cells), board.size)
+
+
+# ===== Монте-Карло =====
+
+def sample_layout(candidates, covering, lengths, open_hits, rng):
+    """Одна случайная расстановка оставшихся кораблей или 0.
+
+    candidates - допустимые расстановки по длинам, covering - допустимые
+    расстановки через каждую раненую клетку. Сначала корабли ставятся на
+    все попадания, затем остальные - в свободные места.
+    """
+    lengths = list(lengths)
+    layout = forbidden = 0
+    uncovered = open_hits
+    while uncovered:
+        hit = (uncovered & -uncovered).bit_length() - 1
+        options = [p for p in covering[hit]
+                   if p.length in lengths and not p.mask & forbidden]
+        if not options:
+            return 0
+        placement = rng.choice(options)
+        lengths.remove(placement.length)
+        layout |= placement.mask
+        forbidden |= placement.exclusion
+        uncovered &= ~placement.mask
+
+    for length in sorted(lengths, reverse=True):
+        options = candidates[length]
+        for _ in range(QUICK_TRIES):
+            placement = rng.choice(options)
+            if not placement.mask & forbidden:
+                break
+        else:
+            options = [p for p in options if not p.mask & forbidden]
+            if not options:
+                return 0
+            placement = rng.choice(options)
+        layout |= placement.mask
+        forbidden |= placement.exclusion
+    return layout
+
+
+def layout_candidates(size, blocked, open_hits, lengths):
+    """Допустимые расстановки для sample_layout: (candidates, covering).
+
+    None, если для какой-то длины расстановок нет вовсе.
+    """
+    index = placement_index(size)
+    candidates = {}
+    covering = {i: [] for i in iter_bits(open_hits)}
+    for length in set(lengths):
+        # Корабль не может лежать на промахе, касаться чужих попаданий и
+        # целиком стоять на раненых клетках - такой корабль уже был бы потоплен
+        candidates[length] = [
+            p for p in index[length]
+            if not p.mask & blocked and not p.exclusion & open_hits & ~p.mask
+            and p.mask & ~open_hits
+        ]
+        if not candidates[length]:
+            return None
+        for p in candidates[length]:
+            for i in iter_bits(p.mask & open_hits):
+                covering[i].append(p)
+    return candidates, covering
+
+
+def sample_occupancy(size, blocked, open_hits, lengths, budget, seed):
+    """Частоты занятости клеток по случайным расстановкам за budget секунд.
+
+    Запускается в процессе пула, поэтому принимает и возвращает только
+    простые значения. Возвращает (частоты, число расстановок).
+    """
+    rng = random.Random(seed)
+    prepared = layout_candidates(size, blocked, open_hits, lengths)
+    if prepared is None:
+        return [0] * (size * size), 0
+    candidates, covering = prepared
+
+    counts = [0] * (size * size)
+    samples = 0
+    deadline = time.perf_counter() + budget
+    while time.perf_counter() < deadline:
+        for _ in range(32):
+            layout = sample_layout(candidates, covering, lengths, open_hits, rng)
+            if layout:
+                samples += 1
+                for i in iter_bits(layout & ~open_hits):
+                    counts[i] += 1
+    return counts, samples
+
+
+@register_strategy("Эксперт")
+class MonteCarloAI(DensityAI):
+    """Экспертный ИИ: разыгрывает тысячи расстановок флота игрока,
+    согласованных со всеми выстрелами, и бьёт в клетку, занятую чаще всего.
+
+    Расстановки набираются параллельно в пуле процессов, пока не выйдет
+    time_budget (или не подойдёт deadline), так что качество хода растёт с числом ядер. Если ни одной
+    расстановки не нашлось, ход выбирается по карте плотности.
+
+    Процессы запускаются через spawn: игра многопоточная, а fork из
+    многопоточного процесса небезопасен. Чтобы запуск не съедал первый
+    ход, пул прогревается в reset.
+    """
+
+    time_limit = 0.5
+
+    def __init__(self, rng=random, ship_types=SHIP_TYPES,
+                 time_budget=MONTE_CARLO_BUDGET, workers=None):
+        self.time_budget = time_budget
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        # Задачи пула текущего хода (или прогрева) - для отмены при закрытии
+        self.futures = []
+        self.last_samples = 0
+        super().__init__(rng, ship_types)
+
+    def reset(self):
+        if self.executor is None:
+            # multiprocessing грузится только для этой стратегии - запуск игры его не ждёт
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self.futures = [self.executor.submit(placement_index, BOARD_SIZE)
+                            for _ in range(self.workers)]
+
+    def drop_executor(self):
+        """Отмена задач и остановка пула без ожидания процессов.
+
+        cancel_futures у shutdown появился только в Python 3.9, поэтому
+        ждущие задачи отменяются вручную.
+        """
+        if self.executor is not None:
+            for future in self.futures:
+                future.cancel()
+            self.futures = []
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def occupancy(self, board, token=None, deadline=None):
+        """Суммарные частоты занятости со всех процессов пула.
+
+        При отмене через token не ждёт процессы и возвращает (None, 0).
+        """
+        budget = self.time_budget
+        wait_until = time.perf_counter() + budget + 1
+        if deadline is not None:
+            budget = max(0.0, min(budget, deadline - time.perf_counter() - MERGE_RESERVE))
+            wait_until = deadline - MERGE_RESERVE / 2
+
+        blocked = (board.shots & ~board.hits) | board.halo | dilate(board.sunk, board.size)
+        open_hits = board.hits & ~board.sunk
+        lengths = [length for length, count in self.remaining_ships(board).items()
+                   for _ in range(count)]
+        args = (board.size, blocked, open_hits, lengths, budget)
+
+        counts = [0] * (board.size * board.size)
+        samples = 0
+        self.reset()
+        try:
+            self.futures = [
+                self.executor.submit(sample_occupancy, *args, self.rng.getrandbits(32))
+                for _ in range(self.workers)
+            ]
+        except BrokenExecutor as e:
+            # Процесс пула убит или упал: пул создаётся заново к следующему ходу
+            print(f"Ошибка пула процессов ИИ: {e}")
+            self.drop_executor()
+            return counts, samples
+        done, pending = set(), set(self.futures)
+        while pending and time.perf_counter() < wait_until:
+            if token is not None and token.cancelled:
+                for future in pending:
+                    future.cancel()
+                return None, 0
+            finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL)
+            done |= finished
+        # Опоздавшие процессы не ждём; их задачи закончатся сами по budget
+        for future in pending:
+            future.cancel()
+
+        for future in done:
+            try:
+                worker_counts, worker_samples = future.result()
+            except BrokenExecutor as e:
+                print(f"Ошибка пула процессов ИИ: {e}")
+                self.drop_executor()
+                continue
+            except Exception as e:
+                print(f"Ошибка при расчёте хода ИИ: {e}")
+                continue
+            samples += worker_samples
+            for i, value in enumerate(worker_counts):
+                counts[i] += value
+        return counts, samples
+
+    def choose(self, board, token=None, deadline=None):
+        """Выбор самой часто занятой клетки; None - если ход отменён."""
+        counts, self.last_samples = self.occupancy(board, token, deadline)
+        if counts is None:
+            return None
+        if not self.last_samples:
+            return super().choose(board)
+
+        checked = board.checked
+        best = max(value for i, value in enumerate(counts) if not checked >> i & 1)
+        cells = [i for i, value in enumerate(counts)
+                 if value == best and not checked >> i & 1]
+        return divmod(self.rng.choice(cells), board.size)
+
+    def shutdown(self):
+        self.drop_executor()
+
+
+# ===== Ограничение времени и замеры =====
+
+class TimedStrategy:
+    """Стратегия с предельным временем хода и замерами.
+
+    Передаёт стратегии deadline = начало хода + time_limit и считает ходы,
+    их время и опоздания. Если стратегия упала или вернула клетку, куда
+    стрелять нельзя, ход заменяется случайной свободной клеткой.
+
+    Заставить стратегию уложиться в срок нельзя, поэтому GUI по истечении
+    времени отменяет ход и стреляет сам (timed_out), а опоздавший расчёт
+    досчитывается в фоне. Пока он идёт, observe и reset не трогают
+    стратегию, а откладываются до начала следующего хода.
+    """
+
+    def __init__(self, name, strategy, time_limit=None):
+        self.name = name
+        self.strategy = strategy
+        self.time_limit = time_limit or strategy.time_limit
+        self._lock = threading.Lock()
+        self._choosing = False
+        self._deferred = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.overruns = 0
+        self.fallbacks = 0
+
+    def _apply(self, method, args):
+        try:
+            method(*args)
+        except Exception as e:
+            print(f"Ошибка стратегии {self.name}: {e}")
+
+    def _call_strategy(self, method, *args):
+        """Вызов метода стратегии; во время choose - отложенный."""
+        with self._lock:
+            if self._choosing:
+                self._deferred.append((method, args))
+            else:
+                self._apply(method, args)
+
+    def reset(self):
+        self._call_strategy(self.strategy.reset)
+
+    def choose(self, view, token=None):
+        with self._lock:
+            self._choosing = True
+            deferred, self._deferred = self._deferred, []
+        for method, args in deferred:
+            self._apply(method, args)
+        started = time.perf_counter()
+        try:
+            target = self.strategy.choose(view, token, started + self.time_limit)
+        except Exception as e:
+            print(f"Ошибка стратегии {self.name}: {e}")
+            target = None
+        finally:
+            with self._lock:
+                self._choosing = False
+        elapsed = time.perf_counter() - started
+        if token is not None and token.cancelled:
+            return None
+
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        if elapsed > self.time_limit:
+            self.overruns += 1
+
+        if target is None or not view.in_bounds(*target) or view.is_shot(*target):
+            self.fallbacks += 1
+            target = view.random_cell(self.strategy.rng) or (0, 0)
+        return target
+
+    def timed_out(self, elapsed):
+        """Ход отменён по истечении времени и заменён выстрелом наугад."""
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.overruns += 1
+        self.fallbacks += 1
+
+    def observe(self, view, row, col, hit, sunk):
+        self._call_strategy(self.strategy.observe, view, row, col, hit, sunk)
+
+    def shutdown(self):
+        self.strategy.shutdown()
+
+    def stats(self):
+        """Замеры ходов: число, среднее и максимальное время, опоздания."""
+        return {
+            "strategy": self.name,
+            "calls": self.calls,
+            "mean_ms": self.total_time / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max_time * 1000,
+            "time_limit_ms": self.time_limit * 1000,
+            "overruns": self.overruns,
+            "fallbacks": self.fallbacks,
+        }
+
+
+DEFAULT_STRATEGY = "Обычный"
+
+
+def create_strategy(name=DEFAULT_STRATEGY, rng=random, ship_types=SHIP_TYPES,
+                    time_limit=None, **options):
+    """Стратегия по названию из STRATEGIES, обёрнутая в TimedStrategy.
+
+    options передаются конструктору стратегии (например, workers).
+    """
+    return TimedStrategy(name, STRATEGIES[name](rng, ship_types, **options), time_limit)
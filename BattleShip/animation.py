@@ -0,0 +1,91 @@
+# animation.py
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+from metrics import timed
+
+FIRE_FRAMES = 3
+FIRE_INTERVAL = 500
+
+
+class FireAnimator(QObject):
+    """Анимация огня на потопленных кораблях.
+
+    Таймер работает только пока на полях есть потопленные корабли и окно
+    видно. Каждый кадр перерисовывает лишь клетки с огнём. Счётчики
+    (stats) позволяют убедиться, что в простое анимация не тратит CPU.
+    """
+
+    def __init__(self, boards, interval=FIRE_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.boards = list(boards)
+        self.frame = 0
+        self.has_fires = False
+        self.paused = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tick)
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.tick_cpu_time = 0.0
+        self.active_time = 0.0
+        self.started_at = None
+
+    def ship_sunk(self):
+        """На одном из полей появился потопленный корабль."""
+        self.has_fires = True
+        self.update_timer()
+
+    def clear(self):
+        """Новая партия - огня больше нет."""
+        self.has_fires = False
+        self.frame = 0
+        self.update_timer()
+
+    def set_paused(self, paused):
+        """Пауза, пока окно свёрнуто или скрыто."""
+        self.paused = paused
+        self.update_timer()
+
+    def is_running(self):
+        return self.timer.isActive()
+
+    def update_timer(self):
+        should_run = self.has_fires and not self.paused
+        if should_run and not self.timer.isActive():
+            self.started_at = time.perf_counter()
+            self.timer.start()
+        elif not should_run and self.timer.isActive():
+            self.timer.stop()
+            self.active_time += time.perf_counter() - self.started_at
+            self.started_at = None
+
+    @timed("ui.animate_fires")
+    def tick(self):
+        started = time.process_time()
+        self.frame = (self.frame + 1) % FIRE_FRAMES
+        for board in self.boards:
+            board.set_fire_frame(self.frame)
+        self.ticks += 1
+        self.tick_cpu_time += time.process_time() - started
+
+    def stats(self):
+        """Счётчики анимации: кадры, частота кадров и затраты CPU."""
+        active_time = self.active_time
+        if self.started_at is not None:
+            active_time += time.perf_counter() - self.started_at
+        return {
+            "running": self.is_running(),
+            "ticks": self.ticks,
+            "active_seconds": active_time,
+            "fps": self.ticks / active_time if active_time else 0.0,
+            "cpu_seconds": self.tick_cpu_time,
+            "cpu_per_tick_ms": (
+                self.tick_cpu_time / self.ticks * 1000 if self.ticks else 0.0
+            ),
+        }
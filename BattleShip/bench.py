@@ -0,0 +1,357 @@
+# bench.py
+"""Набор замеров скорости горячих путей игры.
+
+Группы замеров:
+    engine - генерация флота, проверка расстановки, потопление и конец игры;
+    ai     - полный ход ИИ для каждой стратегии;
+    db     - add_result и get_stats на базах из 1k, 100k и 1M партий;
+    qt     - создание окна и restart_game на платформе offscreen.
+
+У каждого замера свой random.Random(seed) и прогревочные прогоны, так что
+повторный запуск меряет ту же работу. Результат пишется в JSON; с
+--compare сравнивается с сохранённым базовым файлом, и замеры, медиана
+которых выросла больше чем на --threshold, помечаются как регрессии
+(код выхода 1).
+
+Пример:
+    python bench.py -o baseline.json
+    python bench.py -g engine ai --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+from ai import STRATEGIES
+from engine import Board, Game, GameState
+from fleet import SHIP_TYPES, generate_fleet
+
+SEED = 12345
+REPEAT = 20
+WARMUP = 3
+THRESHOLD = 0.15
+DB_ROWS = (1_000, 100_000, 1_000_000)
+# Стратегия Монте-Карло тратит на ход заданный бюджет - мерить её нечего
+AI_STRATEGIES = ("Обычный", "Сложный")
+GROUPS = ("engine", "ai", "db", "qt")
+
+
+class Case(NamedTuple):
+    """Один замер.
+
+    run(state) - измеряемая работа; может вернуть число операций (int),
+    иначе берётся ops. setup() готовит state и в замер не входит.
+    """
+    name: str
+    run: Callable
+    setup: Optional[Callable] = None
+    ops: int = 1
+
+
+def measure(case, repeat=REPEAT, warmup=WARMUP):
+    """Время одной операции в микросекундах по repeat прогонам."""
+    times = []
+    for i in range(warmup + repeat):
+        state = case.setup() if case.setup else None
+        started = time.perf_counter()
+        ops = case.run(state)
+        elapsed = time.perf_counter() - started
+        if not isinstance(ops, int):
+            ops = case.ops
+        if i >= warmup:
+            times.append(elapsed / ops * 1e6)
+    return {
+        "median_us": statistics.median(times),
+        "mean_us": statistics.mean(times),
+        "min_us": min(times),
+        "max_us": max(times),
+        "stdev_us": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+
+# ===== Движок =====
+
+def engine_cases(seed):
+    cases = []
+
+    rng = random.Random(seed)
+    cases.append(Case(
+        "engine.generate_fleet",
+        lambda state: [generate_fleet(SHIP_TYPES, rng) for _ in range(100)],
+        ops=100,
+    ))
+
+    game = Game(rng=random.Random(seed))
+
+    def setup_ai_ships(state):
+        for _ in range(100):
+            game.enemy.reset()
+            game.setup_ai_ships()
+    cases.append(Case("engine.setup_ai_ships", setup_ai_ships, ops=100))
+
+    board = Board()
+    board.place_fleet_random(rng=random.Random(seed))
+    query_rng = random.Random(seed)
+    queries = [
+        (query_rng.randrange(10), query_rng.randrange(10),
+         query_rng.choice(list(SHIP_TYPES)), query_rng.choice("HV"))
+        for _ in range(1000)
+    ]
+    cases.append(Case(
+        "engine.can_place_ship",
+        lambda state: [board.can_place_ship(*query) for query in queries],
+        ops=len(queries),
+    ))
+
+    # Последний выстрел партии: потопление корабля и конец игры
+    finish_rng = random.Random(seed)
+
+    def almost_won_games():
+        games = []
+        for _ in range(100):
+            game = Game(rng=finish_rng)
+            game.game_state = GameState.PLAYING
+            cells = [(i // 10, i % 10) for i in range(100) if game.enemy.has_ship(i // 10, i % 10)]
+            last = finish_rng.choice(cells)
+            for row, col in cells:
+                if (row, col) != last:
+                    game.enemy.fire(row, col)
+            games.append((game, last))
+        return games
+
+    def finish(games):
+        for game, (row, col) in games:
+            game.player_fire(row, col)
+    cases.append(Case("engine.sunk_and_game_over", finish, almost_won_games, ops=100))
+    return cases
+
+
+# ===== ИИ =====
+
+def ai_cases(seed, strategies=AI_STRATEGIES):
+    cases = []
+    for name in strategies:
+        rng = random.Random(seed)
+
+        def new_game(name=name, rng=rng):
+            game = Game(rng=random.Random(rng.getrandbits(32)), strategy=name)
+            game.player.place_fleet_random(rng=rng)
+            game.game_state = GameState.PLAYING
+            return game
+
+        def play(game):
+            moves = 0
+            while game.game_state == GameState.PLAYING:
+                game.player_turn = False
+                game.ai_move()
+                moves += 1
+            game.shutdown()
+            return moves
+        cases.append(Case(f"ai.turn[{name}]", play, new_game))
+    return cases
+
+
+# ===== База данных =====
+
+def create_history_db(path, rows, seed):
+    """База с rows партиями в старой схеме; init_db достраивает сводку."""
+    from db import CREATE_RESULTS_SQL, Database
+
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(CREATE_RESULTS_SQL)
+        conn.executemany(
+            "INSERT INTO results (outcome, date) VALUES (?, ?)",
+            ((rng.choice(("win", "lose")),
+              (start + timedelta(minutes=10 * i)).strftime("%Y-%m-%d %H:%M:%S"))
+             for i in range(rows))
+        )
+    conn.close()
+
+    database = Database(path)
+    database.init_db()
+    return database
+
+
+def db_cases(seed, rows_list, directory):
+    cases = []
+    for rows in rows_list:
+        label = f"{rows // 1000}k" if rows < 1_000_000 else f"{rows // 1_000_000}M"
+        path = os.path.join(directory, f"bench_{rows}.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"Создание базы на {rows} партий...", file=sys.stderr)
+        database = create_history_db(path, rows, seed)
+        rng = random.Random(seed)
+
+        cases.append(Case(
+            f"db.add_result[{label}]",
+            lambda state, database=database, rng=rng:
+                [database.add_result(rng.choice(("win", "lose"))) for _ in range(20)],
+            ops=20,
+        ))
+        cases.append(Case(
+            f"db.get_stats[{label}]",
+            lambda state, database=database: [database.get_stats() for _ in range(200)],
+            ops=200,
+        ))
+    return cases
+
+
+# ===== Интерфейс =====
+
+def qt_cases(seed, directory):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    import db
+    db.DB_PATH = os.path.join(directory, "bench_qt.db")
+    app = QApplication.instance() or QApplication(sys.argv)
+    import main
+
+    windows = []
+
+    def construct(state):
+        window = main.BattleShipGame()
+        window.show()
+        app.processEvents()
+        windows.append(window)
+
+    window = main.BattleShipGame()
+    window.show()
+    app.processEvents()
+    windows.append(window)
+
+    def restart(state):
+        window.restart_game()
+        app.processEvents()
+
+    def dispose():
+        """Освобождение окон без closeEvent: он закрыл бы общую базу."""
+        for window in windows:
+            window.fleet_pool.shutdown()
+            window.ai_executor.shutdown(wait=False)
+            window.game.shutdown()
+            window.hide()
+            window.deleteLater()
+        windows.clear()
+        app.processEvents()
+
+    return [
+        Case("qt.window_construct", construct),
+        Case("qt.restart_game", restart),
+    ], dispose
+
+
+# ===== Запуск и сравнение =====
+
+def run(groups=GROUPS, seed=SEED, repeat=REPEAT, warmup=WARMUP,
+        db_rows=DB_ROWS, strategies=AI_STRATEGIES):
+    results = {}
+    cleanup = None
+    with tempfile.TemporaryDirectory() as directory:
+        cases = []
+        if "engine" in groups:
+            cases += engine_cases(seed)
+        if "ai" in groups:
+            cases += ai_cases(seed, strategies)
+        if "db" in groups:
+            cases += db_cases(seed, db_rows, directory)
+        if "qt" in groups:
+            qt, cleanup = qt_cases(seed, directory)
+            cases += qt
+
+        try:
+            for case in cases:
+                results[case.name] = measure(case, repeat, warmup)
+                print(f"{case.name:32} {results[case.name]['median_us']:12.1f} мкс",
+                      file=sys.stderr)
+        finally:
+            if cleanup:
+                cleanup()
+
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """Сравнение медиан с базовым отчётом; возвращает имена регрессий."""
+    regressions = []
+    for name, current in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:32} {current['median_us']:12.1f} мкс   (нет в базе)")
+            continue
+        ratio = current["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "РЕГРЕССИЯ"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "быстрее"
+        print(f"{name:32} {base['median_us']:12.1f} -> {current['median_us']:12.1f} мкс"
+              f"  x{ratio:.2f} {flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости горячих путей игры")
+    parser.add_argument("-g", "--groups", nargs="+", choices=GROUPS, default=GROUPS,
+                        help="группы замеров (по умолчанию - все)")
+    parser.add_argument("-o", "--output", help="файл для отчёта JSON")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="базовый отчёт JSON для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="допустимый рост медианы (0.15 = 15%%)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--db-rows", type=int, nargs="+", default=DB_ROWS,
+                        help="размеры баз для замеров db")
+    parser.add_argument("--strategies", nargs="+", default=AI_STRATEGIES,
+                        choices=STRATEGIES, help="стратегии для замеров ai")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args.groups, args.seed, args.repeat, args.warmup,
+                 args.db_rows, args.strategies)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bitboard.py
+"""Битовые маски игрового поля.
+
+Клетка (row, col) соответствует биту row * size + col, поле целиком -
+одно целое число Python.
+"""
+from functools import lru_cache
+
+BOARD_SIZE = 10
+
+
+@lru_cache(maxsize=None)
+def full_mask(size=BOARD_SIZE):
+    """Маска всех клеток поля."""
+    return (1 << (size * size)) - 1
+
+
+@lru_cache(maxsize=None)
+def edge_masks(size=BOARD_SIZE):
+    """Маски всех клеток, кроме левого и кроме правого столбца."""
+    left = sum(1 << (r * size) for r in range(size))
+    right = left << (size - 1)
+    full = full_mask(size)
+    return full & ~left, full & ~right
+
+
+def dilate(mask, size=BOARD_SIZE):
+    """Маска вместе со всеми соседними клетками (включая диагональные)."""
+    not_left, not_right = edge_masks(size)
+    row = mask | ((mask << 1) & not_left) | ((mask >> 1) & not_right)
+    return (row | (row << size) | (row >> size)) & full_mask(size)
+
+
+def ship_mask(row, col, length, orientation, size=BOARD_SIZE):
+    """Маска корабля или 0, если он не помещается на поле."""
+    if row < 0 or col < 0:
+        return 0
+    if orientation == "V":
+        if row + length > size or col >= size:
+            return 0
+        step = size
+    else:
+        if col + length > size or row >= size:
+            return 0
+        step = 1
+
+    start = row * size + col
+    mask = 0
+    for i in range(length):
+        mask |= 1 << (start + i * step)
+    return mask
+
+
+def connected_mask(seed, ships, size=BOARD_SIZE):
+    """Корабль, содержащий клетки seed, по маске всех кораблей."""
+    mask = seed & ships
+    while True:
+        grown = dilate(mask, size) & ships
+        if grown == mask:
+            return mask
+        mask = grown
+
+
+def split_ships(fleet_mask, size=BOARD_SIZE):
+    """Маски отдельных кораблей: корабли не касаются друг друга, поэтому
+    каждый - отдельная связная область маски."""
+    ships = []
+    rest = fleet_mask
+    while rest:
+        ship = connected_mask(rest & -rest, fleet_mask, size)
+        ships.append(ship)
+        rest &= ~ship
+    return ships
+
+
+def iter_bits(mask):
+    """Индексы установленных битов маски."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_to_cells(mask, size=BOARD_SIZE):
+    return [divmod(i, size) for i in iter_bits(mask)]
+
+
+def popcount(mask):
+    return bin(mask).count("1")
@@ -0,0 +1,247 @@
+# board_widget.py
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRect, pyqtSignal
+from PyQt6.QtGui import QBrush, QColor, QFont, QPainter, QPen, QRegion
+from bitboard import BOARD_SIZE
+from styles import CELL_STYLES, FIRE_FRAME_STYLES, GRID_LABEL_COLOR
+
+# Состояния клеток
+EMPTY = "empty"
+SHIP = "ship"
+HIT = "hit"
+MISS = "miss"
+CHECKED = "checked"
+FIRE = "fire"
+
+CELL_SIZE = 35
+CELL_SPACING = 1
+LABEL_SIZE = 20
+COLUMN_LABELS = "АБВГДЕЖЗИК"
+
+# Варианты отрисовки клетки
+HOVER = "hover"
+PRESSED = "pressed"
+
+_compiled_styles = None
+
+
+def _compile_style(style, text):
+    return (
+        QPen(QColor(style["border"]), 2),
+        QBrush(QColor(style["background"])),
+        QColor(style["color"]) if text else None,
+        text,
+    )
+
+
+def compiled_cell_styles():
+    """Перо, кисть, цвет и текст для каждого состояния клетки.
+
+    Строится один раз из CELL_STYLES и FIRE_FRAME_STYLES; ключ -
+    (состояние, вариант), где вариант - None, HOVER, PRESSED или номер
+    кадра огня.
+    """
+    global _compiled_styles
+    if _compiled_styles is not None:
+        return _compiled_styles
+
+    compiled = {}
+    for state, style in CELL_STYLES.items():
+        text = style.get("text")
+        if state == FIRE:
+            for frame, frame_style in enumerate(FIRE_FRAME_STYLES):
+                compiled[state, frame] = _compile_style(frame_style, text)
+            continue
+
+        compiled[state, None] = _compile_style(style, text)
+        if "hover_background" in style:
+            compiled[state, HOVER] = _compile_style(
+                dict(style, background=style["hover_background"],
+                     border=style["hover_border"]), text
+            )
+        if "pressed_background" in style:
+            compiled[state, PRESSED] = _compile_style(
+                dict(style, background=style["pressed_background"]), text
+            )
+
+    _compiled_styles = compiled
+    return compiled
+
+
+class BoardWidget(QWidget):
+    """Игровое поле, целиком рисуемое в одном paintEvent.
+
+    Вместо сотни кнопок хранит состояние каждой клетки и определяет
+    клетку под курсором по координатам мыши.
+    """
+
+    cellClicked = pyqtSignal(int, int)
+
+    def __init__(self, size=BOARD_SIZE, parent=None):
+        super().__init__(parent)
+        self.board_size = size
+        self.fire_frame = 0
+        self.hover_cell = None
+        self.pressed_cell = None
+
+        pitch = CELL_SIZE + CELL_SPACING
+        side = LABEL_SIZE + CELL_SPACING + size * pitch
+        self.setFixedSize(side, side)
+        self.setMouseTracking(True)
+
+        self.cell_font = QFont()
+        self.cell_font.setPixelSize(18)
+        self.cell_font.setBold(True)
+        self.label_font = QFont()
+        self.label_font.setBold(True)
+        self.label_pen = QPen(QColor(GRID_LABEL_COLOR))
+        self.styles = compiled_cell_styles()
+
+        self.reset()
+
+    def reset(self):
+        """Все клетки - пустые."""
+        self.states = [EMPTY] * (self.board_size * self.board_size)
+        self.fire_frame = 0
+        self.fire_region = QRegion()
+        self.update()
+
+    # ===== Состояние клеток =====
+
+    def cell_state(self, row, col):
+        return self.states[row * self.board_size + col]
+
+    def set_cell_state(self, row, col, state):
+        self.states[row * self.board_size + col] = state
+        rect = self.cell_rect(row, col)
+        if state == FIRE:
+            self.fire_region = self.fire_region.united(rect)
+        self.update(rect)
+
+    def set_cells_state(self, cells, state):
+        for row, col in cells:
+            self.set_cell_state(row, col, state)
+
+    def set_states(self, states):
+        """Замена состояния всех клеток одной перерисовкой."""
+        self.states = list(states)
+        self.fire_region = QRegion()
+        for index, state in enumerate(self.states):
+            if state == FIRE:
+                rect = self.cell_rect(*divmod(index, self.board_size))
+                self.fire_region = self.fire_region.united(rect)
+        self.update()
+
+    def set_fire_frame(self, frame):
+        """Кадр анимации огня на потопленных кораблях."""
+        self.fire_frame = frame
+        if not self.fire_region.isEmpty():
+            self.update(self.fire_region)
+
+    # ===== Геометрия =====
+
+    def cell_rect(self, row, col):
+        pitch = CELL_SIZE + CELL_SPACING
+        x = LABEL_SIZE + CELL_SPACING + col * pitch
+        y = LABEL_SIZE + CELL_SPACING + row * pitch
+        return QRect(x, y, CELL_SIZE, CELL_SIZE)
+
+    def cell_at(self, pos):
+        """Клетка под точкой виджета или None."""
+        pitch = CELL_SIZE + CELL_SPACING
+        x = pos.x() - LABEL_SIZE - CELL_SPACING
+        y = pos.y() - LABEL_SIZE - CELL_SPACING
+        if x < 0 or y < 0 or x % pitch >= CELL_SIZE or y % pitch >= CELL_SIZE:
+            return None
+
+        row, col = y // pitch, x // pitch
+        if row >= self.board_size or col >= self.board_size:
+            return None
+        return row, col
+
+    # ===== Отрисовка =====
+
+    def cell_style(self, index, state):
+        if state == FIRE:
+            return self.styles[FIRE, self.fire_frame]
+
+        cell = divmod(index, self.board_size)
+        if cell == self.pressed_cell:
+            variant = PRESSED
+        elif cell == self.hover_cell:
+            variant = HOVER
+        else:
+            variant = None
+        return self.styles.get((state, variant)) or self.styles[state, None]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        dirty = event.rect()
+
+        # Заголовки столбцов и строк
+        painter.setFont(self.label_font)
+        painter.setPen(self.label_pen)
+        for i in range(self.board_size):
+            cell = self.cell_rect(i, i)
+            column_rect = QRect(cell.x(), 0, CELL_SIZE, LABEL_SIZE)
+            row_rect = QRect(0, cell.y(), LABEL_SIZE, CELL_SIZE)
+            if column_rect.intersects(dirty):
+                painter.drawText(column_rect, Qt.AlignmentFlag.AlignCenter,
+                                 COLUMN_LABELS[i % len(COLUMN_LABELS)])
+            if row_rect.intersects(dirty):
+                painter.drawText(row_rect, Qt.AlignmentFlag.AlignCenter, str(i + 1))
+
+        # Клетки
+        painter.setFont(self.cell_font)
+        for index, state in enumerate(self.states):
+            rect = self.cell_rect(*divmod(index, self.board_size))
+            if not rect.intersects(dirty):
+                continue
+
+            pen, brush, text_color, text = self.cell_style(index, state)
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            painter.drawRoundedRect(rect.adjusted(1, 1, -1, -1), 3, 3)
+
+            if text:
+                painter.setPen(text_color)
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+
+        painter.end()
+
+    # ===== Мышь =====
+
+    def set_hover_cell(self, cell):
+        if cell == self.hover_cell:
+            return
+        for old in (self.hover_cell, cell):
+            if old is not None:
+                self.update(self.cell_rect(*old))
+        self.hover_cell = cell
+
+    def mouseMoveEvent(self, event):
+        self.set_hover_cell(self.cell_at(event.position().toPoint()))
+
+    def leaveEvent(self, event):
+        self.set_hover_cell(None)
+        super().leaveEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.pressed_cell = self.cell_at(event.position().toPoint())
+            if self.pressed_cell is not None:
+                self.update(self.cell_rect(*self.pressed_cell))
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton:
+            return
+
+        pressed, self.pressed_cell = self.pressed_cell, None
+        if pressed is None:
+            return
+        self.update(self.cell_rect(*pressed))
+
+        # Как у кнопки: клик засчитывается, если отпустили на той же клетке
+        if self.cell_at(event.position().toPoint()) == pressed:
+            self.cellClicked.emit(*pressed)
@@ -1,50 +1,493 @@
+import atexit
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
 
+from metrics import timed
+from movelog import GameRecord
+
 DB_NAME = "battleship.db"
+# Путь к базе не зависит от текущего каталога
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_NAME)
 
+# Тексты запросов постоянные, поэтому sqlite3 подготавливает каждый
+# один раз и дальше берёт из кэша соединения
+CREATE_RESULTS_SQL = '''
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        outcome TEXT NOT NULL,
+        date TEXT NOT NULL
+    )
+'''
+INSERT_RESULT_SQL = '''
+    INSERT INTO results (outcome, date, player_fleet, enemy_fleet, moves)
+    VALUES (?, ?, ?, ?, ?)
+'''
+# Запись партии (см. movelog.py): начальные флоты и байты выстрелов
+ADD_RECORD_COLUMNS_SQL = (
+    "ALTER TABLE results ADD COLUMN player_fleet BLOB",
+    "ALTER TABLE results ADD COLUMN enemy_fleet BLOB",
+    "ALTER TABLE results ADD COLUMN moves BLOB",
+)
 
-def init_db():
-    """Создание таблицы, если её ещё нет."""
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            outcome TEXT NOT NULL,
-            date TEXT NOT NULL
+# Сводка обновляется в той же транзакции, что и вставка результата,
+# поэтому чтение статистики не зависит от длины истории.
+# current_streak > 0 - серия побед, < 0 - серия поражений.
+CREATE_SUMMARY_SQL = '''
+    CREATE TABLE IF NOT EXISTS stats_summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        current_streak INTEGER NOT NULL DEFAULT 0,
+        best_win_streak INTEGER NOT NULL DEFAULT 0
+    )
+'''
+CREATE_DAILY_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        day TEXT PRIMARY KEY,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0
+    )
+'''
+CREATE_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_results_outcome ON results (outcome)",
+    "CREATE INDEX IF NOT EXISTS idx_results_date ON results (date)",
+)
+UPDATE_SUMMARY_SQL = '''
+    UPDATE stats_summary SET
+        wins = wins + (:outcome = 'win'),
+        losses = losses + (:outcome = 'lose'),
+        current_streak = CASE
+            WHEN :outcome = 'win' THEN MAX(current_streak, 0) + 1
+            ELSE MIN(current_streak, 0) - 1
+        END,
+        best_win_streak = CASE
+            WHEN :outcome = 'win'
+            THEN MAX(best_win_streak, MAX(current_streak, 0) + 1)
+            ELSE best_win_streak
+        END
+    WHERE id = 1
+'''
+UPSERT_DAILY_SQL = '''
+    INSERT INTO daily_stats (day, wins, losses)
+    VALUES (:day, :outcome = 'win', :outcome = 'lose')
+    ON CONFLICT (day) DO UPDATE SET
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses
+'''
+SELECT_SUMMARY_SQL = '''
+    SELECT wins, losses, current_streak, best_win_streak
+    FROM stats_summary WHERE id = 1
+'''
+SELECT_DAILY_SQL = '''
+    SELECT day, wins, losses FROM daily_stats ORDER BY day DESC LIMIT ?
+'''
+SELECT_RECORDED_GAMES_SQL = '''
+    SELECT id, date, outcome FROM results
+    WHERE moves IS NOT NULL ORDER BY id DESC LIMIT ?
+'''
+SELECT_GAME_RECORD_SQL = '''
+    SELECT player_fleet, enemy_fleet, moves FROM results WHERE id = ?
+'''
+BACKFILL_DAILY_SQL = '''
+    INSERT INTO daily_stats (day, wins, losses)
+    SELECT substr(date, 1, 10), SUM(outcome = 'win'), SUM(outcome = 'lose')
+    FROM results GROUP BY substr(date, 1, 10)
+'''
+
+# Версия схемы хранится в PRAGMA user_version
+SCHEMA_VERSION = 2
+
+
+def empty_summary():
+    return {"wins": 0, "losses": 0, "current_streak": 0, "best_win_streak": 0}
+
+
+def apply_outcome(summary, outcome):
+    """Учесть результат игры в сводке (то же, что UPDATE_SUMMARY_SQL)."""
+    if outcome == "win":
+        summary["wins"] += 1
+        summary["current_streak"] = max(summary["current_streak"], 0) + 1
+        summary["best_win_streak"] = max(
+            summary["best_win_streak"], summary["current_streak"]
         )
-    ''')
+    else:
+        summary["losses"] += 1
+        summary["current_streak"] = min(summary["current_streak"], 0) - 1
 
-    conn.commit()
-    conn.close()
 
+class Database:
+    """Доступ к базе результатов.
 
-def add_result(outcome: str):
-    """Добавить результат игры (win / lose)."""
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    У каждого потока одно долгоживущее соединение (главному окну хватает
+    одного); журнал WAL и synchronous=NORMAL избавляют запись от fsync
+    на каждую транзакцию.
+    """
 
-    cur.execute(
-        "INSERT INTO results (outcome, date) VALUES (?, ?)",
-        (outcome, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    )
+    def __init__(self, path=DB_PATH):
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.init_db()
 
-    conn.commit()
-    conn.close()
+    def connection(self):
+        """Соединение текущего потока."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
 
+    def init_db(self):
+        """Создание таблиц и перевод старой базы на текущую схему."""
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(CREATE_RESULTS_SQL)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self.migrate_summary(conn)
+            if version < 2:
+                for sql in ADD_RECORD_COLUMNS_SQL:
+                    conn.execute(sql)
+            if version < SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
-def get_stats():
-    """Возвращает количество побед и поражений."""
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    def migrate_summary(self, conn):
+        """Индексы и сводные таблицы, заполненные по уже сохранённым играм."""
+        for sql in CREATE_INDEXES_SQL:
+            conn.execute(sql)
+        conn.execute(CREATE_SUMMARY_SQL)
+        conn.execute(CREATE_DAILY_SQL)
+
+        summary = empty_summary()
+        for (outcome,) in conn.execute("SELECT outcome FROM results ORDER BY id"):
+            apply_outcome(summary, outcome)
+
+        conn.execute(
+            "INSERT OR REPLACE INTO stats_summary "
+            "(id, wins, losses, current_streak, best_win_streak) "
+            "VALUES (1, :wins, :losses, :current_streak, :best_win_streak)",
+            summary
+        )
+        conn.execute("DELETE FROM daily_stats")
+        conn.execute(BACKFILL_DAILY_SQL)
+
+    def add_result(self, outcome: str, record=None):
+        """Добавить результат игры (win / lose) и обновить сводку.
+
+        record - GameRecord партии или None.
+        """
+        self.add_results([(outcome, datetime.now(), record)])
+
+    @timed("db.add_results")
+    def add_results(self, results, busy_timeout=None):
+        """Добавить пачку [(outcome, datetime, record), ...] одной транзакцией.
+
+        busy_timeout - сколько секунд ждать чужую блокировку базы (по
+        умолчанию 5, как у sqlite3.connect).
+        """
+        conn = self.connection()
+        if busy_timeout is not None:
+            conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+        with conn:
+            for outcome, played_at, record in results:
+                params = {"outcome": outcome, "day": played_at.strftime("%Y-%m-%d")}
+                conn.execute(
+                    INSERT_RESULT_SQL,
+                    (outcome, played_at.strftime("%Y-%m-%d %H:%M:%S"))
+                    + (tuple(record) if record else (None, None, None))
+                )
+                conn.execute(UPDATE_SUMMARY_SQL, params)
+                conn.execute(UPSERT_DAILY_SQL, params)
+
+    @timed("db.get_summary")
+    def get_summary(self):
+        """Сводная статистика: победы, поражения и серии."""
+        wins, losses, current_streak, best_win_streak = self.connection().execute(
+            SELECT_SUMMARY_SQL
+        ).fetchone()
+        return {
+            "wins": wins,
+            "losses": losses,
+            "current_streak": current_streak,
+            "best_win_streak": best_win_streak,
+        }
+
+    @timed("db.get_stats")
+    def get_stats(self):
+        """Возвращает количество побед и поражений."""
+        wins, losses, _, _ = self.connection().execute(
+            SELECT_SUMMARY_SQL
+        ).fetchone()
+        return wins, losses
+
+    @timed("db.get_daily_stats")
+    def get_daily_stats(self, days=30):
+        """Победы и поражения по дням, начиная с последнего."""
+        return self.connection().execute(SELECT_DAILY_SQL, (days,)).fetchall()
+
+    @timed("db.get_recorded_games")
+    def get_recorded_games(self, limit=100):
+        """Последние партии с записью ходов: [(id, date, outcome), ...]."""
+        return self.connection().execute(
+            SELECT_RECORDED_GAMES_SQL, (limit,)
+        ).fetchall()
+
+    @timed("db.get_game_record")
+    def get_game_record(self, result_id):
+        """Запись партии (GameRecord) или None."""
+        row = self.connection().execute(
+            SELECT_GAME_RECORD_SQL, (result_id,)
+        ).fetchone()
+        if row is None or row[2] is None:
+            return None
+        return GameRecord(*row)
+
+    def close(self):
+        """Закрытие всех соединений."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class ResultWriter:
+    """Отложенная запись результатов в фоновом потоке.
+
+    add_result() только кладёт результат в очередь и сразу учитывает его
+    в сводке в памяти, поэтому окно конца игры не ждёт диска. Поток
+    записи сбрасывает очередь пачками, по одной транзакции на пачку;
+    close() дописывает всё, что осталось.
+
+    Если после close() база так и не принимает пачку за close_timeout
+    секунд, результаты сохраняются в файл <база>.pending (JSONL) и
+    дописываются в базу при следующем запуске. Каждая попытка записи ждёт
+    блокировку не дольше retry_delay, поэтому close() возвращается через
+    close_timeout (плюс не больше retry_delay на попытку, начатую до него).
+    """
+
+    def __init__(self, database, batch_size=64, retry_delay=0.5, close_timeout=5.0):
+        self.database = database
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.close_timeout = close_timeout
+        self.pending_path = database.path + ".pending"
 
-    cur.execute("SELECT COUNT(*) FROM results WHERE outcome = 'win'")
-    wins = cur.fetchone()[0]
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.load_pending()
+        self._summary = database.get_summary()
+        self._closed = False
+        self._close_deadline = None
 
-    cur.execute("SELECT COUNT(*) FROM results WHERE outcome = 'lose'")
-    losses = cur.fetchone()[0]
+        # Метрики: глубина очереди и задержка от add_result до коммита
+        self.written = 0
+        self.batches = 0
+        self.saved_pending = 0
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
 
-    conn.close()
-    return wins, losses
+        self._thread = threading.Thread(
+            target=self._run, name="result-writer", daemon=True
+        )
+        self._thread.start()
+
+    def add_result(self, outcome: str, record=None):
+        """Поставить результат игры (и запись партии) в очередь на запись."""
+        if self._closed:
+            raise RuntimeError("ResultWriter уже закрыт")
+        with self._lock:
+            apply_outcome(self._summary, outcome)
+        self._queue.put((outcome, datetime.now(), record, time.perf_counter()))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def get_summary(self):
+        """Сводка с учётом ещё не записанных результатов."""
+        with self._lock:
+            return dict(self._summary)
+
+    def get_stats(self):
+        """Возвращает количество побед и поражений."""
+        with self._lock:
+            return self._summary["wins"], self._summary["losses"]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Конец работы: сначала дописываем пачку
+                    self._queue.put(None)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        results = [item[:3] for item in batch]
+        while True:
+            wait_time = self.retry_delay
+            if self._closed:
+                # При закрытии повторяем до close_timeout, потом - в файл
+                wait_time = min(wait_time, self._close_deadline - time.perf_counter())
+                if wait_time <= 0:
+                    self.save_pending(results)
+                    return
+            try:
+                self.database.add_results(results, busy_timeout=wait_time)
+                break
+            except sqlite3.Error as e:
+                print(f"Ошибка записи результатов: {e}")
+                if self._closed:
+                    wait_time = min(wait_time, self._close_deadline - time.perf_counter())
+                time.sleep(max(0.0, wait_time))
+
+        now = time.perf_counter()
+        for *_, enqueued_at in batch:
+            latency = now - enqueued_at
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        self.last_latency = latency
+        self.written += len(batch)
+        self.batches += 1
+
+    def save_pending(self, results):
+        """Дописать результаты, не попавшие в базу, в файл pending."""
+        try:
+            with open(self.pending_path, "a", encoding="utf-8") as f:
+                for outcome, played_at, record in results:
+                    f.write(json.dumps({
+                        "outcome": outcome,
+                        "date": played_at.isoformat(),
+                        "record": [part.hex() for part in record] if record else None,
+                    }) + "\n")
+            self.saved_pending += len(results)
+            print(f"Результаты сохранены в {self.pending_path}: {len(results)}")
+        except OSError as e:
+            print(f"Ошибка сохранения результатов: {e}")
+            for result in results:
+                print(f"Потерян результат: {result[0]} {result[1]}")
+
+    def load_pending(self):
+        """Перенос результатов из файла pending в базу."""
+        if not os.path.exists(self.pending_path):
+            return
+        try:
+            with open(self.pending_path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            self.database.add_results([
+                (row["outcome"], datetime.fromisoformat(row["date"]),
+                 GameRecord(*(bytes.fromhex(part) for part in row["record"]))
+                 if row["record"] else None)
+                for row in rows
+            ])
+            os.remove(self.pending_path)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            print(f"Ошибка переноса результатов из {self.pending_path}: {e}")
+
+    def flush(self, timeout=None):
+        """Дождаться записи всех результатов из очереди.
+
+        С timeout ждёт не дольше timeout секунд; False - если очередь за это
+        время не записалась (например, база заперта другим процессом).
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """Дописать очередь и остановить поток записи."""
+        if self._closed:
+            return
+        self._close_deadline = time.perf_counter() + self.close_timeout
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        """Метрики записи: глубина очереди и задержка сброса (в секундах)."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "written": self.written,
+            "batches": self.batches,
+            "saved_pending": self.saved_pending,
+            "last_flush_latency": self.last_latency,
+            "max_flush_latency": self.max_latency,
+            "avg_flush_latency": (
+                self.total_latency / self.written if self.written else 0.0
+            ),
+        }
+
+
+_database = None
+_result_writer = None
+# База может открываться в фоновом потоке - второй поток ждёт её, а не
+# создаёт свою
+_open_lock = threading.RLock()
+
+
+def get_database():
+    """Общий для приложения экземпляр Database."""
+    global _database
+    with _open_lock:
+        if _database is None:
+            _database = Database(DB_PATH)
+        return _database
+
+
+def get_result_writer():
+    """Общая для приложения очередь записи результатов."""
+    global _result_writer
+    with _open_lock:
+        if _result_writer is None:
+            _result_writer = ResultWriter(get_database())
+            atexit.register(_result_writer.close)
+        return _result_writer
+
+
+def init_db():
+    """Создание таблицы, если её ещё нет."""
+    get_database().init_db()
+
+
+def add_result(outcome: str, record=None):
+    """Добавить результат игры (win / lose)."""
+    get_database().add_result(outcome, record)
+
+
+def get_stats():
+    """Возвращает количество побед и поражений."""
+    return get_database().get_stats()
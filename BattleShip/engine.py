@@ -0,0 +1,395 @@
+# engine.py
+"""Игровая логика морского боя без зависимости от Qt."""
+import random
+from enum import Enum
+
+from bitboard import (
+    BOARD_SIZE, dilate, iter_bits, mask_to_cells, popcount,
+    ship_mask,
+)
+from ai import DEFAULT_STRATEGY, BoardView, create_strategy
+from fleet import SHIP_TYPES, generate_fleet
+from metrics import timed
+from movelog import GameRecord, encode_shot, pack_mask
+
+
+class GameState(Enum):
+    PLACEMENT = 1
+    PLAYING = 2
+    GAME_OVER = 3
+
+
+class ShotResult(Enum):
+    MISS = 1
+    HIT = 2
+    SUNK = 3
+
+
+def ship_positions(row, col, length, orientation):
+    """Клетки корабля заданной длины и ориентации."""
+    if orientation == "V":
+        return [(row + i, col) for i in range(length)]
+    return [(row, col + i) for i in range(length)]
+
+
+class UnshotCells:
+    """Непроверенные клетки поля с удалением и случайным выбором за O(1).
+
+    Клетки разбиты на классы чётности (row + col) % parity; каждый класс -
+    массив номеров клеток, а position хранит место клетки в её массиве.
+    Удаление переносит последний элемент массива на место удаляемого.
+    """
+
+    # Полные наборы по (size, parity): новое поле копирует готовые массивы
+    templates = {}
+
+    def __init__(self, size=BOARD_SIZE, parity=2):
+        self.size = size
+        self.parity = parity
+        template = self.templates.get((size, parity))
+        if template is None:
+            self.classes = [[] for _ in range(parity)]
+            self.position = []
+            for index in range(size * size):
+                cells = self.classes[self.parity_class(index)]
+                self.position.append(len(cells))
+                cells.append(index)
+            template = self.templates[(size, parity)] = (self.classes, self.position)
+        self.classes = [list(cells) for cells in template[0]]
+        self.position = list(template[1])
+
+    def __len__(self):
+        return sum(len(cells) for cells in self.classes)
+
+    def __contains__(self, index):
+        return self.position[index] >= 0
+
+    def parity_class(self, index):
+        return (index // self.size + index % self.size) % self.parity
+
+    def count(self, parity_class):
+        return len(self.classes[parity_class])
+
+    def discard(self, index):
+        """Удаление клетки, если она ещё в наборе."""
+        position = self.position[index]
+        if position < 0:
+            return
+        cells = self.classes[self.parity_class(index)]
+        last = cells.pop()
+        if last != index:
+            cells[position] = last
+            self.position[last] = position
+        self.position[index] = -1
+
+    def discard_mask(self, mask):
+        for index in iter_bits(mask):
+            self.discard(index)
+
+    def random_cell(self, rng=random, parity_class=None):
+        """Случайная клетка (row, col) - из всех или из класса чётности; None, если пусто."""
+        if parity_class is None:
+            choice = rng.randrange(len(self)) if len(self) else None
+            if choice is None:
+                return None
+            for cells in self.classes:
+                if choice < len(cells):
+                    break
+                choice -= len(cells)
+        else:
+            cells = self.classes[parity_class]
+            if not cells:
+                return None
+            choice = rng.randrange(len(cells))
+        return divmod(cells[choice], self.size)
+
+
+class Board:
+    """Одно игровое поле: корабли и выстрелы в виде битовых масок.
+
+    ships  - палубы кораблей;
+    shots  - клетки, по которым стреляли;
+    hits   - попадания (ships & shots);
+    sunk   - палубы потопленных кораблей;
+    halo   - клетки вокруг потопленных кораблей, помеченные без выстрела;
+    blocked - клетки, куда нельзя ставить новый корабль.
+
+    Корабли также хранятся в реестре: ship_at - номер корабля в каждой
+    клетке (-1 - пусто), ship_masks и ship_health - маска и число целых
+    палуб каждого корабля, ships_remaining - сколько кораблей не потоплено.
+    unshot - непроверенные клетки (UnshotCells) для случайного выстрела.
+    """
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        """Очистка поля."""
+        self.ships = 0
+        self.shots = 0
+        self.hits = 0
+        self.sunk = 0
+        self.halo = 0
+        self.blocked = 0
+        self.unshot = UnshotCells(self.size)
+
+        self.ship_at = [-1] * (self.size * self.size)
+        self.ship_masks = []
+        self.ship_health = []
+        self.ships_remaining = 0
+
+    @property
+    def checked(self):
+        """Клетки, куда уже нет смысла стрелять."""
+        return self.shots | self.halo
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def has_ship(self, row, col):
+        return bool(self.ships >> (row * self.size + col) & 1)
+
+    def is_shot(self, row, col):
+        return bool(self.checked >> (row * self.size + col) & 1)
+
+    def can_place_ship(self, row, col, length, orientation):
+        """Проверка возможности размещения корабля."""
+        mask = ship_mask(row, col, length, orientation, self.size)
+        return bool(mask) and not mask & self.blocked
+
+    def place_ship(self, row, col, length, orientation):
+        """Размещение корабля. Возвращает его клетки или None."""
+        mask = ship_mask(row, col, length, orientation, self.size)
+        if not mask or mask & self.blocked:
+            return None
+
+        self.add_ship(mask, dilate(mask, self.size))
+        return ship_positions(row, col, length, orientation)
+
+    def add_ship(self, mask, exclusion):
+        """Регистрация корабля в реестре."""
+        ship_id = len(self.ship_masks)
+        for i in iter_bits(mask):
+            self.ship_at[i] = ship_id
+        self.ship_masks.append(mask)
+        self.ship_health.append(popcount(mask))
+        self.ships_remaining += 1
+
+        self.ships |= mask
+        self.blocked |= exclusion
+        return ship_id
+
+    def place_fleet(self, fleet):
+        """Размещение готового флота (списка Placement)."""
+        for placement in fleet:
+            self.add_ship(placement.mask, placement.exclusion)
+
+    def place_fleet_random(self, ship_types=SHIP_TYPES, rng=random):
+        """Случайное размещение всего флота."""
+        self.place_fleet(generate_fleet(ship_types, rng, self.size))
+
+    def ship_mask_at(self, row, col):
+        """Маска корабля, занимающего клетку (0 - если корабля нет)."""
+        ship_id = self.ship_at[row * self.size + col]
+        return self.ship_masks[ship_id] if ship_id >= 0 else 0
+
+    def get_ship_cells(self, row, col):
+        """Получение всех клеток корабля."""
+        mask = self.ship_mask_at(row, col)
+        return mask_to_cells(mask, self.size) if mask else None
+
+    def fire(self, row, col):
+        """Выстрел по клетке."""
+        index = row * self.size + col
+        bit = 1 << index
+        ship_id = self.ship_at[index]
+        already_shot = self.shots & bit
+        self.shots |= bit
+        self.unshot.discard(index)
+        if ship_id < 0:
+            return ShotResult.MISS
+
+        if not already_shot:
+            self.hits |= bit
+            self.ship_health[ship_id] -= 1
+            if self.ship_health[ship_id] == 0:
+                self.ships_remaining -= 1
+                self.sunk |= self.ship_masks[ship_id]
+
+        if self.ship_health[ship_id]:
+            return ShotResult.HIT
+        return ShotResult.SUNK
+
+    def mark_around_ship(self, ship):
+        """Пометить клетки вокруг корабля как проверенные.
+
+        Принимает маску корабля, возвращает маску помеченных клеток.
+        """
+        marked = dilate(ship, self.size) & ~self.checked
+        self.halo |= marked
+        self.unshot.discard_mask(marked)
+        return marked
+
+    def ships_left(self):
+        """Остались ли непотопленные палубы."""
+        return self.ships_remaining > 0
+
+    def view(self):
+        """Неизменяемый снимок поля для стратегии ИИ."""
+        return BoardView(self.size, self.shots, self.hits, self.sunk, self.halo)
+
+
+class Game:
+    """Партия: поле игрока, поле ИИ, расстановка и ходы."""
+
+    def __init__(self, ship_types=SHIP_TYPES, rng=None, fleet_pool=None,
+                 strategy=DEFAULT_STRATEGY):
+        self.ship_types = dict(ship_types)
+        self.rng = rng or random.Random()
+        self.fleet_pool = fleet_pool
+        self.strategy = strategy
+        self.ai = create_strategy(strategy, self.rng, self.ship_types)
+        self.player = Board()
+        self.enemy = Board()
+        self.reset()
+
+    def reset(self):
+        """Новая партия."""
+        self.player.reset()
+        self.enemy.reset()
+
+        self.game_state = GameState.PLACEMENT
+        self.current_ship_length = max(self.ship_types)
+        self.current_ship_count = 0
+        self.current_orientation = "H"
+
+        self.ai.reset()
+        self.player_turn = True
+        self.outcome = None
+        # Выстрелы обеих сторон по порядку, по байту на выстрел
+        self.moves = bytearray()
+
+        self.setup_ai_ships()
+
+    def setup_ai_ships(self):
+        """Размещение всех кораблей ИИ."""
+        if self.fleet_pool is not None:
+            self.enemy.place_fleet(self.fleet_pool.pop())
+        else:
+            self.enemy.place_fleet_random(self.ship_types, self.rng)
+
+    def set_strategy(self, strategy):
+        """Смена стратегии ИИ; действует сразу, в том числе посреди партии."""
+        if strategy == self.strategy:
+            return
+        self.ai.shutdown()
+        self.strategy = strategy
+        self.ai = create_strategy(strategy, self.rng, self.ship_types)
+
+    def shutdown(self):
+        """Освобождение ресурсов ИИ (пула процессов)."""
+        self.ai.shutdown()
+
+    # ===== Расстановка =====
+
+    def rotate_ship(self):
+        """Поворот ориентации корабля."""
+        self.current_orientation = "V" if self.current_orientation == "H" else "H"
+        return self.current_orientation
+
+    def place_player_ship(self, row, col):
+        """Размещение корабля игроком."""
+        if not self.player.place_ship(
+                row, col, self.current_ship_length, self.current_orientation
+        ):
+            return False
+
+        self.current_ship_count += 1
+        if self.current_ship_count >= self.ship_types[self.current_ship_length]:
+            shorter = [length for length in self.ship_types
+                       if length < self.current_ship_length]
+            if shorter:
+                self.current_ship_length = max(shorter)
+                self.current_ship_count = 0
+            else:
+                self.game_state = GameState.PLAYING
+        return True
+
+    def remaining_ships(self):
+        """Сколько кораблей текущей длины осталось поставить."""
+        return self.ship_types[self.current_ship_length] - self.current_ship_count
+
+    # ===== Ходы =====
+
+    def player_fire(self, row, col):
+        """Выстрел игрока. None - если сюда уже стреляли."""
+        if self.enemy.is_shot(row, col):
+            return None
+
+        result = self.enemy.fire(row, col)
+        self.record_shot(row, col, result)
+        self.player_turn = result != ShotResult.MISS
+        self.check_game_over()
+        return result
+
+    def record_shot(self, row, col, result):
+        self.moves.append(
+            encode_shot(row * self.player.size + col, result != ShotResult.MISS)
+        )
+
+    def game_record(self):
+        """Запись партии: начальные флоты и все выстрелы."""
+        return GameRecord(
+            pack_mask(self.player.ships, self.player.size),
+            pack_mask(self.enemy.ships, self.enemy.size),
+            bytes(self.moves),
+        )
+
+    def ai_move(self):
+        """Ход ИИ. Возвращает (row, col, результат, помеченные клетки) или None."""
+        if self.player_turn or self.game_state != GameState.PLAYING:
+            return None
+        return self.ai_fire(*self.ai_choose())
+
+    @timed("ai.choose")
+    def ai_choose(self, token=None, view=None):
+        """Выбор клетки ИИ. Может занимать время.
+
+        token (ai.CancelToken) позволяет прервать долгий расчёт; тогда
+        возвращается None. view - снимок поля игрока, снятый до запуска
+        расчёта в фоновом потоке (по умолчанию - текущий).
+        """
+        return self.ai.choose(view or self.player.view(), token)
+
+    def ai_fire(self, row, col):
+        """Выстрел ИИ по выбранной клетке, см. ai_move."""
+        if self.player_turn or self.game_state != GameState.PLAYING:
+            return None
+
+        result = self.player.fire(row, col)
+        self.record_shot(row, col, result)
+        checked_cells = set()
+
+        if result == ShotResult.MISS:
+            self.player_turn = True
+        elif result == ShotResult.SUNK:
+            ship = self.player.ship_mask_at(row, col)
+            marked = self.player.mark_around_ship(ship)
+            checked_cells = set(mask_to_cells(marked, self.player.size))
+
+        self.ai.observe(self.player.view(), row, col,
+                        result != ShotResult.MISS, result == ShotResult.SUNK)
+        self.check_game_over()
+        return row, col, result, checked_cells
+
+    def check_game_over(self):
+        """Проверка окончания игры. Возвращает 'win', 'lose' или None."""
+        if not self.player.ships_left():
+            self.outcome = "lose"
+        elif not self.enemy.ships_left():
+            self.outcome = "win"
+
+        if self.outcome:
+            self.game_state = GameState.GAME_OVER
+        return self.outcome
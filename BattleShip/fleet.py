@@ -0,0 +1,185 @@
+# fleet.py
+"""Случайная расстановка флота по заранее вычисленному индексу расстановок."""
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple
+
+from bitboard import BOARD_SIZE, dilate, ship_mask
+
+SHIP_TYPES = {4: 1, 3: 2, 2: 3, 1: 4}
+
+# Сколько случайных расстановок пробовать до перебора всех допустимых
+QUICK_TRIES = 8
+MAX_STEPS = 20000
+
+# Размер пула готовых флотов и порог, при котором он пополняется
+POOL_SIZE = 32
+POOL_REFILL_THRESHOLD = 8
+
+
+class Placement(NamedTuple):
+    length: int
+    row: int
+    col: int
+    orientation: str
+    mask: int
+    exclusion: int
+
+
+@lru_cache(maxsize=None)
+def placement_index(size=BOARD_SIZE):
+    """Все допустимые расстановки кораблей каждой длины на пустом поле.
+
+    exclusion - маска корабля вместе с соседними клетками: туда нельзя
+    ставить следующие корабли.
+    """
+    index = {}
+    for length in range(1, size + 1):
+        # Однопалубный корабль в обеих ориентациях одинаков
+        orientations = ["H"] if length == 1 else ["H", "V"]
+        placements = []
+        for orientation in orientations:
+            for row in range(size):
+                for col in range(size):
+                    mask = ship_mask(row, col, length, orientation, size)
+                    if mask:
+                        placements.append(Placement(
+                            length, row, col, orientation, mask, dilate(mask, size)
+                        ))
+        index[length] = tuple(placements)
+    return index
+
+
+def generate_fleet(ship_types=SHIP_TYPES, rng=random, size=BOARD_SIZE,
+                   max_steps=MAX_STEPS):
+    """Случайный флот - список Placement.
+
+    Корабль выбирается среди ещё допустимых расстановок; если следующие
+    корабли поставить некуда, выбор откатывается. Число шагов поиска
+    ограничено max_steps, при превышении - ValueError.
+    """
+    index = placement_index(size)
+    lengths = sorted(
+        (length for length, count in ship_types.items() for _ in range(count)),
+        reverse=True
+    )
+    fleet = []
+    steps = 0
+
+    def place(i, blocked):
+        nonlocal steps
+        if i == len(lengths):
+            return True
+        steps += 1
+        if steps > max_steps:
+            raise ValueError("Флот не помещается на поле")
+
+        placements = index[lengths[i]]
+        tried = None
+
+        # Быстрый путь: на почти пустом поле случайная расстановка из
+        # индекса почти всегда допустима
+        for _ in range(QUICK_TRIES):
+            placement = placements[rng.randrange(len(placements))]
+            if not placement.mask & blocked:
+                fleet.append(placement)
+                if place(i + 1, blocked | placement.exclusion):
+                    return True
+                fleet.pop()
+                tried = placement
+                break
+
+        candidates = [
+            p for p in placements if not p.mask & blocked and p is not tried
+        ]
+        while candidates:
+            j = rng.randrange(len(candidates))
+            placement = candidates[j]
+            fleet.append(placement)
+            if place(i + 1, blocked | placement.exclusion):
+                return True
+            fleet.pop()
+            candidates[j] = candidates[-1]
+            candidates.pop()
+        return False
+
+    if not place(0, 0):
+        raise ValueError("Флот не помещается на поле")
+    return fleet
+
+
+def generate_fleets(n, ship_types=SHIP_TYPES, rng=random, size=BOARD_SIZE):
+    """Генератор n случайных флотов для симуляций."""
+    for _ in range(n):
+        yield generate_fleet(ship_types, rng, size)
+
+
+class FleetPool:
+    """Запас готовых флотов, пополняемый в фоновом потоке.
+
+    pop() отдаёт флот за O(1); когда в пуле остаётся refill_threshold
+    флотов или меньше, пул дозаполняется до size в отдельном потоке.
+    """
+
+    def __init__(self, size=POOL_SIZE, refill_threshold=POOL_REFILL_THRESHOLD,
+                 ship_types=SHIP_TYPES, board_size=BOARD_SIZE, rng=None):
+        if not 0 <= refill_threshold < size:
+            raise ValueError("refill_threshold должен быть меньше size")
+
+        self.size = size
+        self.refill_threshold = refill_threshold
+        self.ship_types = dict(ship_types)
+        self.board_size = board_size
+        self.rng = rng or random.Random()
+
+        self._fleets = deque()
+        self._lock = threading.Lock()
+        # self.rng общий для pop() и потока пополнения
+        self._rng_lock = threading.Lock()
+        self._refilling = False
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fleet-pool"
+        )
+        self._schedule_refill()
+
+    def __len__(self):
+        return len(self._fleets)
+
+    def pop(self):
+        """Готовый флот. Если пул пуст - генерируется сразу."""
+        try:
+            fleet = self._fleets.popleft()
+        except IndexError:
+            fleet = self._generate()
+
+        if len(self._fleets) <= self.refill_threshold:
+            self._schedule_refill()
+        return fleet
+
+    def _generate(self):
+        with self._rng_lock:
+            return generate_fleet(self.ship_types, self.rng, self.board_size)
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._refilling or self._closed:
+                return
+            self._refilling = True
+        self._executor.submit(self._refill)
+
+    def _refill(self):
+        try:
+            while len(self._fleets) < self.size and not self._closed:
+                self._fleets.append(self._generate())
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def shutdown(self, wait=False):
+        """Остановка фонового пополнения."""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
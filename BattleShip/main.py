@@ -1,54 +1,73 @@
-import sys
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
-from PyQt6.QtGui import *
-from enum import Enum
-import random
-import sqlite3
-from datetime import datetime
-from styles import *
-from windows import StatsWindow, AboutWindow, SettingsWindow
-
-DB_NAME = "battleship.db"
+import time
 
+# Отсчёт времени до первого кадра - до тяжёлых импортов
+APP_STARTED = time.perf_counter()
 
-class GameState(Enum):
-    PLACEMENT = 1
-    PLAYING = 2
-    GAME_OVER = 3
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from PyQt6.QtWidgets import (
+    QApplication, QGroupBox, QHBoxLayout, QLabel, QMainWindow, QMessageBox,
+    QPushButton, QVBoxLayout, QWidget,
+)
+from PyQt6.QtCore import QEvent, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QKeySequence, QShortcut
+from styles import *
+from board_widget import BoardWidget, SHIP, HIT, MISS, CHECKED, FIRE
+from animation import FireAnimator
+from engine import Game, GameState, ShotResult, ship_positions
+from ai import CancelToken
+from fleet import FleetPool
+from db import get_database, get_result_writer
+from watchdog import LagWatchdog
+from profiling import SessionProfiler, profiling_requested
+from resources import logo_pixmap
+import metrics
+from metrics import timed
+
+# Пул заранее сгенерированных флотов ИИ
+FLEET_POOL_SIZE = 32
+FLEET_POOL_REFILL_THRESHOLD = 8
+
+# Минимальная пауза перед показом хода ИИ, мс
+AI_MOVE_DELAY = 800
+# Запас сверх time_limit стратегии, после которого ход делается без неё, мс
+AI_DEADLINE_GRACE = 250
+# Сколько ждать отменённый ход ИИ при перезапуске и закрытии, секунды
+AI_CANCEL_WAIT = 0.2
+
+# Снимок профиля в режиме --profile
+PROFILE_SHORTCUT = "Ctrl+Shift+P"
 
 
 class BattleShipGame(QMainWindow):
-    def __init__(self):
+    # Ход ИИ посчитан в фоновом потоке: (CancelToken, concurrent.futures.Future)
+    aiTargetReady = pyqtSignal(object, object)
+
+    def __init__(self, profiler=None, started=None):
         super().__init__()
+        # Время до первого кадра считается от started (по умолчанию - от создания окна)
+        self.started = started or time.perf_counter()
+        self.first_frame_ms = None
         self.setWindowTitle("Морской Бой")
         self.setGeometry(300, 300, 900, 600)
         self.setStyleSheet(MAIN_WINDOW_STYLE)
 
-        # ===== Настройки кораблей =====
-        self.ship_types = {4: 1, 3: 2, 2: 3, 1: 4}
-        self.current_ship_length = 4
-        self.current_ship_count = 0
-        self.current_orientation = "H"
-
-        self.ai_targets = []
-        self.current_target_hits = []
-        self.hunting_mode = False
-        self.player_turn = True
-
-        self.game_state = GameState.PLACEMENT
-
-        # Таймер для анимации огоньков
-        self.fire_animation_timer = QTimer()
-        self.fire_animation_timer.timeout.connect(self.animate_fires)
-        self.fire_animation_state = 0
-        self.sunken_ships_player = []
-        self.sunken_ships_ai = []
+        # ===== Игровая модель =====
+        self.fleet_pool = FleetPool(FLEET_POOL_SIZE, FLEET_POOL_REFILL_THRESHOLD)
+        self.game = Game(fleet_pool=self.fleet_pool)
+        # Ход ИИ считается вне потока GUI, чтобы окно не замирало
+        self.ai_executor = ThreadPoolExecutor(max_workers=1)
+        self.ai_future = None
+        self.ai_token = None
+        self.ai_started = 0.0
+        # Сыгранные за сессию партии - для меток снимков профиля
+        self.games_played = 0
 
         # ===== Создание UI =====
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         self.layout = QVBoxLayout(central_widget)
+        central_widget.setStyleSheet(CONTROL_BUTTONS_SHEET)
 
         # === ВЕРХНЯЯ ЧАСТЬ С ЛОГОТИПОМ В ПРАВОМ УГЛУ ===
         top_widget = QWidget()
@@ -59,21 +78,11 @@ class BattleShipGame(QMainWindow):
         top_layout.addStretch()
 
         # Правая часть - логотип
-        try:
+        logo = logo_pixmap(120, 60)
+        if not logo.isNull():
             logo_label = QLabel()
-            logo_pixmap = QPixmap("assets/Logo.png")
-            if not logo_pixmap.isNull():
-                logo_pixmap = logo_pixmap.scaled(
-                    120, 60,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                logo_label.setPixmap(logo_pixmap)
-            else:
-                logo_label = QLabel("⚓")
-                logo_label.setStyleSheet("font-size: 24px;")
-        except Exception as e:
-            print(f"Ошибка загрузки логотипа: {e}")
+            logo_label.setPixmap(logo)
+        else:
             logo_label = QLabel("⚓")
             logo_label.setStyleSheet("font-size: 24px;")
 
@@ -96,26 +105,17 @@ class BattleShipGame(QMainWindow):
 
         self.set_fields()
 
-        # Кнопки управления
-        self.restart_button = QPushButton("Начать заново")
-        self.restart_button.setFixedSize(200, 40)
-        self.restart_button.setStyleSheet(CONTROL_BUTTON_STYLE)
-
-        self.orientation_btn = QPushButton("Повернуть корабль")
-        self.orientation_btn.setFixedSize(200, 40)
-        self.orientation_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
-
-        self.stats_button = QPushButton("Статистика")
-        self.stats_button.setFixedSize(200, 40)
-        self.stats_button.setStyleSheet(STATS_BUTTON_STYLE)
-
-        self.about_button = QPushButton("О программе")
-        self.about_button.setFixedSize(200, 40)
-        self.about_button.setStyleSheet(CONTROL_BUTTON_STYLE)
+        # Анимация огоньков на потопленных кораблях
+        self.fire_animator = FireAnimator(
+            [self.player_board, self.enemy_board], parent=self
+        )
 
-        self.settings_button = QPushButton("Настройки")
-        self.settings_button.setFixedSize(200, 40)
-        self.settings_button.setStyleSheet(CONTROL_BUTTON_STYLE)
+        # Кнопки управления
+        self.restart_button = self.create_control_button("Начать заново")
+        self.orientation_btn = self.create_control_button("Повернуть корабль")
+        self.stats_button = self.create_control_button("Статистика", role="stats")
+        self.about_button = self.create_control_button("О программе")
+        self.settings_button = self.create_control_button("Настройки")
 
         # Контейнер для кнопок
         button_layout = QHBoxLayout()
@@ -147,128 +147,68 @@ class BattleShipGame(QMainWindow):
         self.stats_button.clicked.connect(self.show_stats)
         self.about_button.clicked.connect(self.show_about)
         self.settings_button.clicked.connect(self.show_settings)
+        self.aiTargetReady.connect(self.ai_target_ready)
 
         self.statusBar().showMessage("Сейчас расставляем корабли")
 
-        # Инициализация
-        self.init_db()
-        self.setup_ai_ships()
-        self.fire_animation_timer.start(500)
-
-    # ===== Функции БД =====
-
-    def init_db(self):
-        """Инициализация базы данных."""
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                outcome TEXT NOT NULL,
-                date TEXT NOT NULL
-            )
-        ''')
-        conn.commit()
-        conn.close()
-
-    def add_result(self, outcome: str):
-        """Добавление результата игры в БД."""
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO results (outcome, date) VALUES (?, ?)",
-            (outcome, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        # База статистики открывается в фоне после первого кадра
+        # (open_storage): перевод старой базы на новую схему может идти секунды
+        self.db = None
+        self.results = None
+        self.storage_future = None
+
+        # Диагностика: задержка цикла событий и счётчики для окна замеров
+        if metrics.ENABLED:
+            self.watchdog = LagWatchdog(parent=self)
+            self.watchdog.start()
+        metrics.register_source("Анимация", self.fire_animator.stats)
+        metrics.register_source(
+            "Запись результатов", lambda: self.results.stats() if self.results else {}
         )
-        conn.commit()
-        conn.close()
-
-    def get_stats(self):
-        """Получение статистики из БД."""
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM results WHERE outcome = 'win'")
-        wins = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM results WHERE outcome = 'lose'")
-        losses = cur.fetchone()[0]
-        conn.close()
-        return wins, losses
+        metrics.register_source("ИИ", lambda: self.game.ai.stats())
 
-    # ===== Функции игры =====
+        # Режим профилирования: снимок по горячей клавише
+        self.profiler = profiler
+        if profiler is not None:
+            QShortcut(QKeySequence(PROFILE_SHORTCUT), self, activated=self.dump_profile)
 
-    def animate_fires(self):
-        """Анимация огня на потопленных кораблях."""
-        self.fire_animation_state = (self.fire_animation_state + 1) % 3
-        current_style = FIRE_ANIMATION_STYLES[self.fire_animation_state]
+    def create_control_button(self, text, role="control"):
+        """Управляющая кнопка; стиль берётся из общей таблицы по role."""
+        button = QPushButton(text)
+        button.setFixedSize(200, 40)
+        button.setProperty("role", role)
+        return button
 
-        for ship_cells in self.sunken_ships_player + self.sunken_ships_ai:
-            for btn in ship_cells:
-                btn.setStyleSheet(current_style)
+    # ===== Функции игры =====
 
     def mark_ship_as_sunken(self, ship_cells, is_player_ship=False):
         """Пометить корабль как потопленный."""
-        if is_player_ship:
-            self.sunken_ships_player.append(ship_cells)
-        else:
-            self.sunken_ships_ai.append(ship_cells)
-
-        for btn in ship_cells:
-            btn.setStyleSheet(FIRE_ANIMATION_STYLES[0])
+        board = self.player_board if is_player_ship else self.enemy_board
+        board.set_cells_state(ship_cells, FIRE)
+        self.fire_animator.ship_sunk()
 
-    def mark_around_ship_as_checked(self, ship_cells):
+    def mark_around_ship_as_checked(self, checked_cells):
         """Пометить клетки вокруг корабля как проверенные."""
-        checked_cells = set()
-
-        for cell in ship_cells:
-            row, col = self.get_button_coords(cell, is_enemy=False)
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    nr, nc = row + dr, col + dc
-                    if 0 <= nr < 10 and 0 <= nc < 10:
-                        btn = self.player_buttons[nr][nc]
-                        if not getattr(btn, "shot", False):
-                            btn.shot = True
-                            btn.setStyleSheet(MISS_BUTTON_STYLE)
-                            checked_cells.add((nr, nc))
-
-        self.ai_targets = [
-            pos for pos in self.ai_targets if pos not in checked_cells
-        ]
-        return checked_cells
+        self.player_board.set_cells_state(checked_cells, CHECKED)
 
     def rotate_ship(self):
         """Поворот ориентации корабля."""
-        if self.current_orientation == "H":
-            self.current_orientation = "V"
+        if self.game.rotate_ship() == "V":
             self.statusBar().showMessage("Текущая ориентация: вертикально")
         else:
-            self.current_orientation = "H"
             self.statusBar().showMessage("Текущая ориентация: горизонтально")
 
+    @timed("ui.restart_game")
     def restart_game(self):
         """Перезапуск игры."""
-        self.fire_animation_timer.stop()
-
-        for row in self.player_buttons + self.enemy_buttons:
-            for btn in row:
-                btn.setText("")
-                btn.setProperty("has_ship", False)
-                btn.setStyleSheet(BUTTON_STYLE)
-                if hasattr(btn, "shot"):
-                    delattr(btn, "shot")
-
-        self.game_state = GameState.PLACEMENT
-        self.current_ship_length = 4
-        self.current_ship_count = 0
-        self.ai_targets.clear()
-        self.current_target_hits.clear()
-        self.hunting_mode = False
-        self.player_turn = True
-        self.sunken_ships_player.clear()
-        self.sunken_ships_ai.clear()
-        self.fire_animation_state = 0
-
-        self.setup_ai_ships()
-        self.fire_animation_timer.start(500)
+        self.cancel_ai_move()
+        self.fire_animator.clear()
+
+        # reset() каждого поля - одна перерисовка только этого виджета
+        self.player_board.reset()
+        self.enemy_board.reset()
+
+        self.game.reset()
         self.statusBar().showMessage("Сейчас расставляем корабли")
 
     def create_field(self, title_text: str, is_enemy=False):
@@ -277,48 +217,20 @@ class BattleShipGame(QMainWindow):
         vbox = QVBoxLayout(group_box)
         group_box.setStyleSheet(FIELD_GROUP_STYLE)
 
-        grid = QGridLayout()
-        grid.setSpacing(1)
-
-        # Заголовки столбцов
-        for col, bukva in enumerate("АБВГДЕЖЗИК", start=1):
-            label = QLabel(bukva)
-            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            label.setStyleSheet(GRID_LABEL_STYLE)
-            grid.addWidget(label, 0, col)
-
-        buttons = []
-        for row in range(1, 11):
-            # Заголовки строк
-            num_label = QLabel(str(row))
-            num_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            num_label.setStyleSheet(GRID_LABEL_STYLE)
-            grid.addWidget(num_label, row, 0)
-
-            row_buttons = []
-            for col in range(1, 11):
-                btn = QPushButton()
-                btn.setFixedSize(35, 35)
-                btn.setProperty("has_ship", False)
-                btn.clicked.connect(
-                    lambda checked, b=btn: self.cell_clicked(b, is_enemy)
-                )
-                btn.setStyleSheet(BUTTON_STYLE)
-                grid.addWidget(btn, row, col)
-                row_buttons.append(btn)
-            buttons.append(row_buttons)
-
-        vbox.addLayout(grid)
-        grid.setSizeConstraint(QLayout.SizeConstraint.SetFixedSize)
-        return group_box, buttons
+        board = BoardWidget()
+        board.cellClicked.connect(
+            lambda row, col: self.cell_clicked(row, col, is_enemy)
+        )
+        vbox.addWidget(board, alignment=Qt.AlignmentFlag.AlignCenter)
+        return group_box, board
 
     def set_fields(self):
         """Установка игровых полей."""
         layout = QHBoxLayout()
-        self.player_field, self.player_buttons = self.create_field(
+        self.player_field, self.player_board = self.create_field(
             "Твоё поле", is_enemy=False
         )
-        self.enemy_field, self.enemy_buttons = self.create_field(
+        self.enemy_field, self.enemy_board = self.create_field(
             "Поле соперника", is_enemy=True
         )
         layout.addWidget(self.player_field)
@@ -326,414 +238,312 @@ class BattleShipGame(QMainWindow):
         layout.addWidget(self.enemy_field)
         self.layout.addLayout(layout)
 
-    def set_ship_on_button(self, btn):
-        """Установка корабля на кнопку."""
-        btn.setProperty("has_ship", True)
-        btn.setStyleSheet(SHIP_BUTTON_STYLE)
-
-    def btn_has_ship(self, btn):
-        """Проверка наличия корабля на кнопке."""
-        return btn.property("has_ship")
-
-    def get_button_coords(self, btn, is_enemy):
-        """Получение координат кнопки."""
-        field_buttons = self.enemy_buttons if is_enemy else self.player_buttons
-        for r in range(10):
-            for c in range(10):
-                if field_buttons[r][c] == btn:
-                    return r, c
-        return -1, -1
-
-    def can_place_ship(self, row, col, length, orientation, field_buttons):
-        """Проверка возможности размещения корабля."""
-        for i in range(length):
-            r = row + i if orientation == "V" else row
-            c = col + i if orientation == "H" else col
-            if r >= 10 or c >= 10:
-                return False
-
-            if field_buttons[r][c].property("has_ship"):
-                return False
-
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < 10 and 0 <= nc < 10:
-                        if field_buttons[nr][nc].property("has_ship"):
-                            return False
-        return True
-
     def place_ship_player(self, row, col):
         """Размещение корабля игроком."""
-        length = self.current_ship_length
-        if not self.can_place_ship(
-                row, col, length, self.current_orientation, self.player_buttons
-        ):
+        length = self.game.current_ship_length
+        orientation = self.game.current_orientation
+        if not self.game.place_player_ship(row, col):
             self.statusBar().showMessage("Нельзя поставить корабль здесь!")
             return False
 
-        for i in range(length):
-            r = row + i if self.current_orientation == "V" else row
-            c = col + i if self.current_orientation == "H" else col
-            self.set_ship_on_button(self.player_buttons[r][c])
-
-        self.current_ship_count += 1
-
-        if self.current_ship_count >= self.ship_types[self.current_ship_length]:
-            if self.current_ship_length == 4:
-                self.current_ship_length = 3
-            elif self.current_ship_length == 3:
-                self.current_ship_length = 2
-            elif self.current_ship_length == 2:
-                self.current_ship_length = 1
-            else:
-                self.game_state = GameState.PLAYING
-                self.statusBar().showMessage(
-                    "Все корабли расставлены! Ходите на поле соперника."
-                )
-                return True
+        self.player_board.set_cells_state(
+            ship_positions(row, col, length, orientation), SHIP
+        )
 
-            self.current_ship_count = 0
+        if self.game.game_state == GameState.PLAYING:
             self.statusBar().showMessage(
-                f"Ставьте {self.current_ship_length}-палубный корабль"
+                "Все корабли расставлены! Ходите на поле соперника."
             )
-        else:
-            remaining = (
-                    self.ship_types[self.current_ship_length] - self.current_ship_count
+        elif self.game.current_ship_count == 0:
+            self.statusBar().showMessage(
+                f"Ставьте {self.game.current_ship_length}-палубный корабль"
             )
+        else:
             self.statusBar().showMessage(
-                f"{self.current_ship_length}-палубный корабль поставлен! "
-                f"Осталось: {remaining}"
+                f"{length}-палубный корабль поставлен! "
+                f"Осталось: {self.game.remaining_ships()}"
             )
 
         return True
 
-    def cell_clicked(self, btn, is_enemy=False):
+    @timed("ui.cell_clicked")
+    def cell_clicked(self, row, col, is_enemy=False):
         """Обработка клика по клетке."""
-        row, col = self.get_button_coords(btn, is_enemy)
-        if row == -1 or col == -1:
-            return
-
-        if self.game_state == GameState.PLACEMENT and not is_enemy:
+        if self.game.game_state == GameState.PLACEMENT and not is_enemy:
             self.place_ship_player(row, col)
             return
 
-        if not self.player_turn or self.game_state != GameState.PLAYING:
+        if not self.game.player_turn or self.game.game_state != GameState.PLAYING:
             return
 
         if not is_enemy:
             self.statusBar().showMessage("Стрельба по своему полю невозможна!")
             return
 
-        if getattr(btn, "shot", False):
+        result = self.game.player_fire(row, col)
+        if result is None:
             self.statusBar().showMessage("Вы уже стреляли сюда!")
             return
 
-        btn.shot = True
-        hit = self.btn_has_ship(btn)
-
-        if hit:
-            btn.setText("✕")
-            btn.setStyleSheet(HIT_BUTTON_STYLE)
+        if result == ShotResult.MISS:
+            self.enemy_board.set_cell_state(row, col, MISS)
+            self.statusBar().showMessage("Промах! Ход переходит к ИИ")
+            self.ai_move()
+        else:
+            self.enemy_board.set_cell_state(row, col, HIT)
             self.statusBar().showMessage("Попадание! Ходите ещё раз!")
 
-            ship_cells = self.get_ship_cells(row, col, is_enemy=True)
-            if ship_cells and all(
-                    getattr(cell, "shot", False) for cell in ship_cells
-            ):
+            if result == ShotResult.SUNK:
+                ship_cells = self.game.enemy.get_ship_cells(row, col)
                 self.mark_ship_as_sunken(ship_cells, is_player_ship=False)
                 self.statusBar().showMessage(
                     "Корабль противника потоплен! 🔥 Ходите ещё раз!"
                 )
 
-            self.player_turn = True
-        else:
-            btn.setText("•")
-            btn.setStyleSheet(MISS_BUTTON_STYLE)
-            self.statusBar().showMessage("Промах! Ход переходит к ИИ")
-            self.player_turn = False
-            QTimer.singleShot(800, self.ai_move)
-
         self.check_game_over()
 
-    def get_ship_cells(self, row, col, is_enemy=False):
-        """Получение всех клеток корабля."""
-        field_buttons = self.enemy_buttons if is_enemy else self.player_buttons
-
-        if not field_buttons[row][col].property("has_ship"):
-            return None
-
-        ship_cells = []
-
-        # Проверяем горизонтальное расположение
-        r, c = row, col
-        while c >= 0 and field_buttons[r][c].property("has_ship"):
-            ship_cells.append(field_buttons[r][c])
-            c -= 1
-
-        c = col + 1
-        while c < 10 and field_buttons[r][c].property("has_ship"):
-            ship_cells.append(field_buttons[r][c])
-            c += 1
-
-        if len(ship_cells) > 1:
-            return ship_cells
-
-        # Проверяем вертикальное расположение
-        ship_cells = []
-        r, c = row, col
-        while r >= 0 and field_buttons[r][c].property("has_ship"):
-            ship_cells.append(field_buttons[r][c])
-            r -= 1
-
-        r = row + 1
-        while r < 10 and field_buttons[r][c].property("has_ship"):
-            ship_cells.append(field_buttons[r][c])
-            r += 1
-
-        return ship_cells
-
-    def place_ship_ai(self, length):
-        """Размещение корабля ИИ."""
-        attempts = 0
-        while attempts < 100:
-            attempts += 1
-            orientation = random.choice(["H", "V"])
-            if orientation == "H":
-                row = random.randint(0, 9)
-                col = random.randint(0, 10 - length)
-            else:
-                row = random.randint(0, 10 - length)
-                col = random.randint(0, 9)
-
-            can_place = True
-            for i in range(length):
-                r = row + i if orientation == "V" else row
-                c = col + i if orientation == "H" else col
-
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < 10 and 0 <= nc < 10:
-                            if self.enemy_buttons[nr][nc].property("has_ship"):
-                                can_place = False
-                                break
-                    if not can_place:
-                        break
-                if not can_place:
-                    break
-
-            if can_place:
-                for i in range(length):
-                    r = row + i if orientation == "V" else row
-                    c = col + i if orientation == "H" else col
-                    self.enemy_buttons[r][c].setProperty("has_ship", True)
-                return True
-
-        return False
-
-    def setup_ai_ships(self):
-        """Размещение всех кораблей ИИ."""
-        for length, count in self.ship_types.items():
-            for _ in range(count):
-                self.place_ship_ai(length)
-
-    def get_possible_directions(self, row, col):
-        """Получение возможных направлений для стрельбы."""
-        directions = []
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = row + dr, col + dc
-            if 0 <= nr < 10 and 0 <= nc < 10:
-                btn = self.player_buttons[nr][nc]
-                if not getattr(btn, "shot", False):
-                    directions.append((nr, nc))
-        return directions
-
-    def get_ship_orientation(self):
-        """Определение ориентации корабля."""
-        if len(self.current_target_hits) < 2:
-            return None
-
-        sorted_hits = sorted(self.current_target_hits)
-        first_hit = sorted_hits[0]
-        second_hit = sorted_hits[1]
-
-        if first_hit[0] == second_hit[0]:
-            return "H"
-        elif first_hit[1] == second_hit[1]:
-            return "V"
-        return None
-
-    def get_targets_along_orientation(self, orientation):
-        """Получение целей вдоль ориентации корабля."""
-        targets = []
-
-        if orientation == "H":
-            min_col = min(hit[1] for hit in self.current_target_hits)
-            max_col = max(hit[1] for hit in self.current_target_hits)
-            row = self.current_target_hits[0][0]
-
-            left_col = min_col - 1
-            if (left_col >= 0 and not getattr(
-                    self.player_buttons[row][left_col], "shot", False
-            )):
-                targets.append((row, left_col))
-
-            right_col = max_col + 1
-            if (right_col < 10 and not getattr(
-                    self.player_buttons[row][right_col], "shot", False
-            )):
-                targets.append((row, right_col))
-
-        elif orientation == "V":
-            min_row = min(hit[0] for hit in self.current_target_hits)
-            max_row = max(hit[0] for hit in self.current_target_hits)
-            col = self.current_target_hits[0][1]
-
-            top_row = min_row - 1
-            if (top_row >= 0 and not getattr(
-                    self.player_buttons[top_row][col], "shot", False
-            )):
-                targets.append((top_row, col))
-
-            bottom_row = max_row + 1
-            if (bottom_row < 10 and not getattr(
-                    self.player_buttons[bottom_row][col], "shot", False
-            )):
-                targets.append((bottom_row, col))
-
-        return targets
-
     def ai_move(self):
-        """Ход искусственного интеллекта."""
-        if self.player_turn or self.game_state != GameState.PLAYING:
+        """Ход искусственного интеллекта.
+
+        Клетка выбирается в фоновом потоке, а выстрел показывается не
+        раньше чем через AI_MOVE_DELAY мс после начала хода: быстрый ИИ
+        выглядит как прежде, а время медленного не добавляется к паузе.
+        """
+        if self.ai_token is not None:
+            return
+        if self.game.player_turn or self.game.game_state != GameState.PLAYING:
             return
 
-        if self.hunting_mode and self.ai_targets:
-            row, col = self.ai_targets.pop(0)
-        elif self.hunting_mode:
-            orientation = self.get_ship_orientation()
-            if orientation:
-                self.ai_targets = self.get_targets_along_orientation(orientation)
-                if self.ai_targets:
-                    row, col = self.ai_targets.pop(0)
-                else:
-                    self.hunting_mode = False
-                    row, col = self.get_random_cell()
-            else:
-                all_directions = []
-                for hit in self.current_target_hits:
-                    directions = self.get_possible_directions(hit[0], hit[1])
-                    all_directions.extend(directions)
-
-                self.ai_targets = list(set(all_directions))
-                if self.ai_targets:
-                    row, col = self.ai_targets.pop(0)
-                else:
-                    self.hunting_mode = False
-                    row, col = self.get_random_cell()
-        else:
-            row, col = self.get_random_cell()
+        token = CancelToken()
+        self.ai_token = token
+        self.ai_started = time.perf_counter()
+        self.ai_future = self.ai_executor.submit(
+            self.game.ai_choose, token, self.game.player.view()
+        )
+        # Колбэк вызывается в рабочем потоке, сигнал доставит Future в GUI
+        self.ai_future.add_done_callback(
+            lambda future: self.aiTargetReady.emit(token, future)
+        )
+        QTimer.singleShot(AI_MOVE_DELAY, lambda: self.show_ai_thinking(token))
+        time_limit = int(self.game.ai.time_limit * 1000) + AI_DEADLINE_GRACE
+        QTimer.singleShot(time_limit, lambda: self.ai_deadline(token))
+
+    def show_ai_thinking(self, token):
+        """ИИ считает дольше паузы между ходами - сообщаем об этом."""
+        if token is self.ai_token and not token.cancelled and not self.ai_future.done():
+            self.statusBar().showMessage("ИИ думает...")
+
+    def cancel_ai_move(self):
+        """Отмена хода ИИ при перезапуске партии и закрытии окна."""
+        if self.ai_token is None:
+            return
+        self.ai_token.cancel()
+        self.ai_token = None
+        # Расчёт работает со снимком поля, так что его не обязательно
+        # дожидаться; отменённый ход обычно завершается за CANCEL_POLL_INTERVAL
+        wait([self.ai_future], timeout=AI_CANCEL_WAIT)
+        self.ai_future = None
+
+    def ai_target_ready(self, token, future):
+        """Клетка выбрана - выстрел после оставшейся части паузы."""
+        if token is not self.ai_token or token.cancelled:
+            return
 
-        btn = self.player_buttons[row][col]
-        btn.shot = True
+        try:
+            target = future.result()
+        except Exception as e:
+            # Ошибка ИИ не должна останавливать партию - стреляем наугад
+            print(f"Ошибка при ходе ИИ: {e}")
+            target = self.game.player.unshot.random_cell() or (0, 0)
+        self.fire_after_delay(token, target)
+
+    def ai_deadline(self, token):
+        """Стратегия не уложилась в time_limit - стреляем наугад без неё.
+
+        Поток прервать нельзя: отменённый расчёт досчитается в фоне, а его
+        результат будет отброшен.
+        """
+        if token is not self.ai_token or token.cancelled or self.ai_future.done():
+            return
+        token.cancel()
+        self.game.ai.timed_out(time.perf_counter() - self.ai_started)
+        print(f"ИИ не уложился в {self.game.ai.time_limit:.2f} с, ход наугад")
+        self.fire_after_delay(token, self.game.player.unshot.random_cell() or (0, 0))
+
+    def fire_after_delay(self, token, target):
+        """Выстрел ИИ после оставшейся части паузы AI_MOVE_DELAY."""
+        elapsed = int((time.perf_counter() - self.ai_started) * 1000)
+        delay = AI_MOVE_DELAY - elapsed
+        if delay > 0:
+            QTimer.singleShot(delay, lambda: self.ai_fire(token, target))
+        else:
+            self.ai_fire(token, target)
 
-        if self.btn_has_ship(btn):
-            btn.setText("✕")
-            btn.setStyleSheet(HIT_BUTTON_STYLE)
-            self.statusBar().showMessage("ИИ попал! Он ходит ещё раз!")
+    @timed("ui.ai_move")
+    def ai_fire(self, token, target):
+        """Выстрел ИИ по клетке, выбранной в фоне."""
+        if token is not self.ai_token:
+            return
+        self.ai_token = None
+        self.ai_future = None
 
-            self.current_target_hits.append((row, col))
-            self.hunting_mode = True
+        move = self.game.ai_fire(*target)
+        if move is None:
+            return
 
-            orientation = self.get_ship_orientation()
-            if orientation:
-                self.ai_targets = self.get_targets_along_orientation(orientation)
-            else:
-                new_directions = self.get_possible_directions(row, col)
-                self.ai_targets.extend(new_directions)
+        row, col, result, checked_cells = move
 
-            self.ai_targets = list(set(self.ai_targets))
+        if result == ShotResult.MISS:
+            self.player_board.set_cell_state(row, col, MISS)
+            self.statusBar().showMessage("ИИ промахнулся! Ваш ход!")
+        else:
+            self.player_board.set_cell_state(row, col, HIT)
+            self.statusBar().showMessage("ИИ попал! Он ходит ещё раз!")
 
-            ship_cells = self.get_ship_cells(row, col, is_enemy=False)
-            if ship_cells and all(
-                    getattr(cell, "shot", False) for cell in ship_cells
-            ):
+            if result == ShotResult.SUNK:
+                ship_cells = self.game.player.get_ship_cells(row, col)
                 self.mark_ship_as_sunken(ship_cells, is_player_ship=True)
-                self.mark_around_ship_as_checked(ship_cells)
+                self.mark_around_ship_as_checked(checked_cells)
                 self.statusBar().showMessage(
                     "ИИ потопил ваш корабль! 🔥 Он ходит ещё раз!"
                 )
-                self.current_target_hits.clear()
-                self.ai_targets.clear()
-                self.hunting_mode = False
 
-            self.player_turn = False
-            QTimer.singleShot(800, self.ai_move)
-        else:
-            btn.setText("•")
-            btn.setStyleSheet(MISS_BUTTON_STYLE)
-            self.statusBar().showMessage("ИИ промахнулся! Ваш ход!")
-            self.player_turn = True
+            self.ai_move()
 
         self.check_game_over()
 
-    def get_random_cell(self):
-        """Получение случайной клетки для выстрела."""
-        possible_cells = [
-            (r, c) for r in range(10) for c in range(10)
-            if not getattr(self.player_buttons[r][c], "shot", False)
-        ]
-        return random.choice(possible_cells) if possible_cells else (0, 0)
+    # Диалоги импортируются при первом открытии - запуск их не ждёт
 
     def show_stats(self):
         """Показать окно статистики."""
+        self.open_storage()
+        if not self.storage_future.done():
+            self.statusBar().showMessage("Статистика ещё загружается, подождите...")
+            return
+        from windows import StatsWindow
         stats_window = StatsWindow(self)
         stats_window.exec()
 
     def show_about(self):
         """Показать окно 'О программе'."""
+        from windows import AboutWindow
         about_window = AboutWindow(self)
         about_window.exec()
 
     def show_settings(self):
         """Показать окно настроек."""
-        settings_window = SettingsWindow(self)
+        from windows import SettingsWindow
+        # Смена стратегии заменяет ИИ - его текущий ход считаем заново
+        self.cancel_ai_move()
+        settings_window = SettingsWindow(self.game, self)
         settings_window.exec()
+        self.ai_move()
+
+    def profile_tag(self):
+        """Метка снимков профиля: число партий и стратегия ИИ."""
+        return f"games{self.games_played}_{self.game.strategy}"
+
+    def dump_profile(self):
+        """Снимок cProfile и tracemalloc по горячей клавише."""
+        try:
+            prof_path, report_path = self.profiler.dump(self.profile_tag())
+            self.statusBar().showMessage(f"Профиль сохранён: {prof_path}")
+        except Exception as e:
+            print(f"Ошибка сохранения профиля: {e}")
 
+    def open_storage(self):
+        """Открытие базы статистики и очереди записи в фоновом потоке."""
+        if self.storage_future is not None:
+            return
+
+        def open_in_background():
+            self.db = get_database()
+            self.results = get_result_writer()
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self.storage_future = executor.submit(open_in_background)
+        executor.shutdown(wait=False)
+
+    def wait_storage(self):
+        """Дождаться открытия базы; True - если она открылась."""
+        self.open_storage()
+        try:
+            self.storage_future.result()
+            return True
+        except Exception as e:
+            print(f"Ошибка открытия базы статистики: {e}")
+            return False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - self.started) * 1000
+            metrics.record("ui.first_frame", self.first_frame_ms)
+            # Всё, что не нужно для первого кадра, - после него
+            QTimer.singleShot(0, self.open_storage)
+
+    def changeEvent(self, event):
+        """Пауза анимации, пока окно свёрнуто."""
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.fire_animator.set_paused(self.isMinimized() or not self.isVisible())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.fire_animator.set_paused(self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.fire_animator.set_paused(True)
+        super().hideEvent(event)
+
+    def closeEvent(self, event):
+        """Закрытие окна."""
+        self.fleet_pool.shutdown()
+        self.cancel_ai_move()
+        # Текущий ход уже дождались в cancel_ai_move - отменять нечего
+        self.ai_executor.shutdown(wait=False)
+        self.game.shutdown()
+        if self.storage_future is not None and self.wait_storage():
+            self.results.close()
+            self.db.close()
+        super().closeEvent(event)
+
+    @timed("ui.check_game_over")
     def check_game_over(self):
         """Проверка окончания игры."""
-        player_ships_left = any(
-            self.player_buttons[r][c].property("has_ship") and
-            not getattr(self.player_buttons[r][c], "shot", False)
-            for r in range(10) for c in range(10)
-        )
-        enemy_ships_left = any(
-            self.enemy_buttons[r][c].property("has_ship") and
-            not getattr(self.enemy_buttons[r][c], "shot", False)
-            for r in range(10) for c in range(10)
-        )
+        outcome = self.game.outcome
+        if outcome is None:
+            return
 
-        if not player_ships_left:
-            self.game_state = GameState.GAME_OVER
-            self.add_result("lose")
-            wins, losses = self.get_stats()
-            QMessageBox.information(
-                self, "Игра окончена",
-                f"ИИ победил!\n\nСтатистика:\nПобед: {wins}\nПоражений: {losses}"
-            )
-        elif not enemy_ships_left:
-            self.game_state = GameState.GAME_OVER
-            self.add_result("win")
-            wins, losses = self.get_stats()
-            QMessageBox.information(
-                self, "Игра окончена",
-                f"Вы победили!\n\nСтатистика:\nПобед: {wins}\nПоражений: {losses}"
-            )
+        self.games_played += 1
+        message = "Вы победили!" if outcome == "win" else "ИИ победил!"
+        # Без базы результат не сохранить, но об окончании партии сообщаем всегда
+        if self.wait_storage():
+            self.results.add_result(outcome, self.game.game_record())
+            wins, losses = self.results.get_stats()
+            message += f"\n\nСтатистика:\nПобед: {wins}\nПоражений: {losses}"
+        # Модальное окно ждёт игрока - в замеры хода это время не входит
+        QTimer.singleShot(0, lambda: self.show_game_over(message))
+
+    def show_game_over(self, message):
+        """Окно с итогом партии."""
+        QMessageBox.information(self, "Игра окончена", message)
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = BattleShipGame()
+    # python main.py --profile или BATTLESHIP_PROFILE=1 - см. profiling.py
+    profile, argv = profiling_requested(sys.argv)
+    profiler = SessionProfiler() if profile else None
+    if profiler is not None:
+        profiler.start()
+    app = QApplication(argv)
+    window = BattleShipGame(profiler, started=APP_STARTED)
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if profiler is not None:
+        try:
+            prof_path, report_path = profiler.stop(window.profile_tag())
+            print(f"Профиль сохранён: {prof_path}, {report_path}")
+        except Exception as e:
+            print(f"Ошибка сохранения профиля: {e}")
+    sys.exit(exit_code)
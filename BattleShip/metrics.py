@@ -0,0 +1,189 @@
+# metrics.py
+"""Лёгкие замеры горячих путей: таймеры и гистограммы с фиксированными корзинами.
+
+Замер - два вызова time.perf_counter и поиск корзины, поэтому сбор можно
+держать включённым всегда. Переменная окружения BATTLESHIP_METRICS=0
+выключает его полностью: декоратор timed тогда возвращает функцию без
+обёртки. set_enabled(False) лишь приостанавливает запись.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+ENABLED = os.environ.get("BATTLESHIP_METRICS", "1") != "0"
+
+# Верхние границы корзин, мс; последняя корзина - всё, что дольше
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 16, 25, 50, 100, 250, 500, 1000, 2500)
+
+_enabled = ENABLED
+_histograms = {}
+_sources = {}
+_lock = threading.Lock()
+
+
+class Histogram:
+    """Распределение длительностей по корзинам BUCKETS_MS."""
+
+    def __init__(self, name, buckets=BUCKETS_MS):
+        self.name = name
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        index = bisect_left(self.buckets, ms)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += ms
+            if ms > self.max:
+                self.max = ms
+
+    def merge(self, other):
+        """Добавить замеры другой гистограммы с теми же корзинами."""
+        if other.buckets != self.buckets:
+            raise ValueError("Гистограммы с разными корзинами")
+        with self.lock:
+            self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+            self.count += other.count
+            self.total += other.total
+            self.max = max(self.max, other.max)
+
+    # Гистограммы передаются между процессами (simulate.py) - без блокировки
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def percentile(self, q):
+        """Оценка перцентиля: верхняя граница корзины, где он лежит."""
+        if not self.count:
+            return 0.0
+        needed = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= needed:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "count": self.count,
+                "mean_ms": self.total / self.count if self.count else 0.0,
+                "p50_ms": self.percentile(50),
+                "p95_ms": self.percentile(95),
+                "p99_ms": self.percentile(99),
+                "max_ms": self.max,
+                "buckets": dict(zip(
+                    [f"<={bound}" for bound in self.buckets] + ["inf"], self.counts
+                )),
+            }
+
+
+def histogram(name):
+    """Гистограмма по имени; создаётся при первом обращении."""
+    hist = _histograms.get(name)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+
+def record(name, ms):
+    if _enabled:
+        histogram(name).record(ms)
+
+
+@contextmanager
+def timer(name):
+    """Замер блока кода: with metrics.timer("db.add_result"): ..."""
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).record((time.perf_counter() - started) * 1000)
+
+
+def timed(name):
+    """Декоратор замера функции; при BATTLESHIP_METRICS=0 ничего не оборачивает."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        hist = histogram(name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.record((time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorate
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Приостановка и возобновление записи (без BATTLESHIP_METRICS=0)."""
+    global _enabled
+    _enabled = ENABLED and enabled
+
+
+def register_source(name, stats):
+    """Дополнительные счётчики для отчёта: stats() -> dict."""
+    _sources[name] = stats
+
+
+def reset():
+    for hist in list(_histograms.values()):
+        with hist.lock:
+            hist.reset()
+
+
+def snapshot():
+    """Все гистограммы и счётчики источников."""
+    sources = {}
+    for name, stats in list(_sources.items()):
+        try:
+            sources[name] = stats()
+        except Exception as e:
+            sources[name] = {"error": str(e)}
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "enabled": _enabled,
+        "histograms": {name: hist.snapshot()
+                       for name, hist in sorted(_histograms.items())},
+        "sources": sources,
+    }
+
+
+def export(path):
+    """Сохранение snapshot() в JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
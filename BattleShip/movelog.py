@@ -0,0 +1,83 @@
+# movelog.py
+"""Компактная запись партии.
+
+Каждый выстрел - один байт: младшие 7 бит - номер клетки row * 10 + col
+(поэтому поле не больше 11x11), старший бит - попадание. Потопление в
+байт не помещается (100 клеток x 3 исхода > 256), но однозначно
+восстанавливается по флотам. Кто стрелял, тоже не хранится: игрок ходит
+первым, ход переходит после промаха.
+
+Флоты хранятся 100-битными масками (13 байт): корабли не касаются
+друг друга, поэтому каждый корабль - отдельная связная область маски.
+"""
+from typing import NamedTuple
+
+from bitboard import BOARD_SIZE, split_ships
+
+HIT_FLAG = 0x80
+CELL_MASK = 0x7F
+
+PLAYER = "player"
+AI = "ai"
+
+MISS = "miss"
+HIT = "hit"
+SUNK = "sunk"
+
+
+class GameRecord(NamedTuple):
+    player_fleet: bytes
+    enemy_fleet: bytes
+    moves: bytes
+
+
+class Move(NamedTuple):
+    shooter: str
+    row: int
+    col: int
+    result: str
+
+
+def encode_shot(index, hit):
+    return index | HIT_FLAG if hit else index
+
+
+def decode_shot(byte):
+    return byte & CELL_MASK, bool(byte & HIT_FLAG)
+
+
+def pack_mask(mask, size=BOARD_SIZE):
+    return mask.to_bytes((size * size + 7) // 8, "little")
+
+
+def unpack_mask(data):
+    return int.from_bytes(data, "little")
+
+
+def decode_moves(record, size=BOARD_SIZE):
+    """Разбор записи партии в список Move."""
+    # Игрок стреляет по флоту ИИ, ИИ - по флоту игрока
+    targets = {
+        PLAYER: split_ships(unpack_mask(record.enemy_fleet), size),
+        AI: split_ships(unpack_mask(record.player_fleet), size),
+    }
+    shots = {PLAYER: 0, AI: 0}
+
+    moves = []
+    shooter = PLAYER
+    for byte in record.moves:
+        index, hit = decode_shot(byte)
+        bit = 1 << index
+        shots[shooter] |= bit
+
+        if not hit:
+            result = MISS
+        else:
+            ship = next(s for s in targets[shooter] if s & bit)
+            result = SUNK if not ship & ~shots[shooter] else HIT
+
+        row, col = divmod(index, size)
+        moves.append(Move(shooter, row, col, result))
+        if not hit:
+            shooter = AI if shooter == PLAYER else PLAYER
+    return moves
@@ -0,0 +1,112 @@
+# profiling.py
+"""Режим профилирования сессии: cProfile и tracemalloc.
+
+Включается флагом --profile у main.py или переменной окружения
+BATTLESHIP_PROFILE=1. Снимки пишутся при выходе и по горячей клавише в
+папку profiles рядом с игрой (или в BATTLESHIP_PROFILE_DIR):
+    <время>_<метка>.prof - статистика cProfile (snakeviz, pstats);
+    <время>_<метка>.txt  - самые тяжёлые функции, крупнейшие выделения
+                           памяти и их рост с прошлого снимка.
+"""
+import io
+import os
+import tracemalloc
+from datetime import datetime
+
+PROFILE_FLAG = "--profile"
+PROFILE_ENV = "BATTLESHIP_PROFILE"
+PROFILE_DIR_ENV = "BATTLESHIP_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Глубина стека для каждого выделения памяти
+TRACEMALLOC_FRAMES = 10
+# Сколько строк выводить в каждом разделе отчёта
+REPORT_LIMIT = 30
+
+
+def profiling_requested(argv):
+    """Включён ли режим профилирования; возвращает (включён, argv без флага)."""
+    enabled = os.environ.get(PROFILE_ENV, "0") not in ("", "0")
+    if PROFILE_FLAG in argv:
+        enabled = True
+        argv = [arg for arg in argv if arg != PROFILE_FLAG]
+    return enabled, argv
+
+
+class SessionProfiler:
+    """cProfile и tracemalloc на всю сессию со снимками по запросу.
+
+    cProfile видит только поток, в котором запущен, - поток GUI с циклом
+    событий Qt. Время ходов ИИ в рабочем потоке смотрите в metrics.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR
+        # cProfile и pstats тянут за собой десятки модулей, а этот модуль
+        # импортируется при каждом запуске игры - грузим их по требованию
+        import cProfile
+
+        self.profile = cProfile.Profile()
+        self.previous_snapshot = None
+        self.running = False
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.profile.enable()
+        self.running = True
+
+    def dump(self, tag):
+        """Снимок профиля и памяти; возвращает пути к .prof и .txt."""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.directory, f"{stamp}_{tag}")
+
+        # Статистику cProfile можно снять только с остановленного профиля;
+        # разбор снимка памяти в профиль тоже не должен попасть
+        import pstats
+
+        self.profile.disable()
+        try:
+            self.profile.dump_stats(base + ".prof")
+            functions = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=functions)
+            stats.sort_stats("cumulative").print_stats(REPORT_LIMIT)
+            self.write_report(base + ".txt", tag, stamp, functions.getvalue())
+        finally:
+            if self.running:
+                self.profile.enable()
+        return base + ".prof", base + ".txt"
+
+    def write_report(self, path, tag, stamp, functions):
+        """Текстовый отчёт: память, её рост и тяжёлые функции."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"Метка: {tag}",
+            f"Время: {stamp}",
+            f"Память: сейчас {current / 1024:.1f} КБ, пик {peak / 1024:.1f} КБ",
+            "",
+            f"=== Крупнейшие выделения памяти (топ {REPORT_LIMIT}) ===",
+        ]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:REPORT_LIMIT]]
+        if self.previous_snapshot is not None:
+            lines += ["", f"=== Рост памяти с прошлого снимка (топ {REPORT_LIMIT}) ==="]
+            lines += [str(stat) for stat in
+                      snapshot.compare_to(self.previous_snapshot, "lineno")[:REPORT_LIMIT]]
+        lines += ["", "=== Функции по суммарному времени ===", functions]
+        self.previous_snapshot = snapshot
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    def stop(self, tag):
+        """Последний снимок и остановка профилирования."""
+        self.running = False
+        try:
+            return self.dump(tag)
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,84 @@
+# replay.py
+"""Воспроизведение сохранённой партии с быстрой перемоткой."""
+from typing import NamedTuple
+
+from bitboard import BOARD_SIZE, dilate, split_ships
+from movelog import AI, MISS, PLAYER, SUNK, decode_moves, unpack_mask
+
+# Через сколько ходов сохраняется полный снимок полей
+KEYFRAME_INTERVAL = 10
+
+
+class BoardSnapshot(NamedTuple):
+    shots: int = 0
+    hits: int = 0
+    sunk: int = 0
+    halo: int = 0
+
+
+class ReplayState(NamedTuple):
+    """Поля после некоторого числа ходов."""
+    player: BoardSnapshot
+    enemy: BoardSnapshot
+
+
+class Replay:
+    """Партия, разобранная для просмотра.
+
+    Снимки обоих полей хранятся каждые keyframe_interval ходов;
+    state_at(n) берёт ближайший снимок и доигрывает не больше
+    keyframe_interval - 1 ходов, а не всю партию с начала.
+    """
+
+    def __init__(self, record, size=BOARD_SIZE, keyframe_interval=KEYFRAME_INTERVAL):
+        self.size = size
+        self.keyframe_interval = keyframe_interval
+        self.moves = decode_moves(record, size)
+        self.player_fleet = unpack_mask(record.player_fleet)
+        self.enemy_fleet = unpack_mask(record.enemy_fleet)
+        self.ships = {
+            PLAYER: split_ships(self.enemy_fleet, size),
+            AI: split_ships(self.player_fleet, size),
+        }
+
+        self.keyframes = []
+        state = ReplayState(BoardSnapshot(), BoardSnapshot())
+        for n, move in enumerate(self.moves):
+            if n % keyframe_interval == 0:
+                self.keyframes.append(state)
+            state = self.apply(state, move)
+        if len(self.moves) % keyframe_interval == 0:
+            self.keyframes.append(state)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def apply(self, state, move):
+        """Состояние после ещё одного хода."""
+        # Игрок стреляет по полю ИИ, ИИ - по полю игрока
+        board = state.enemy if move.shooter == PLAYER else state.player
+        bit = 1 << (move.row * self.size + move.col)
+
+        shots = board.shots | bit
+        hits, sunk, halo = board.hits, board.sunk, board.halo
+        if move.result != MISS:
+            hits |= bit
+        if move.result == SUNK:
+            ship = next(s for s in self.ships[move.shooter] if s & bit)
+            sunk |= ship
+            if move.shooter == AI:
+                halo |= dilate(ship, self.size) & ~(shots | halo)
+
+        board = BoardSnapshot(shots, hits, sunk, halo)
+        if move.shooter == PLAYER:
+            return ReplayState(state.player, board)
+        return ReplayState(board, state.enemy)
+
+    def state_at(self, n):
+        """Поля после первых n ходов."""
+        n = max(0, min(n, len(self.moves)))
+        start = n // self.keyframe_interval * self.keyframe_interval
+        state = self.keyframes[start // self.keyframe_interval]
+        for move in self.moves[start:n]:
+            state = self.apply(state, move)
+        return state
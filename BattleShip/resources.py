@@ -0,0 +1,39 @@
+# resources.py
+"""Картинки игры: пути от папки модуля и общий кэш QPixmapCache."""
+import os
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap, QPixmapCache
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+LOGO_PATH = os.path.join(ASSETS_DIR, "Logo.png")
+
+
+def cached_pixmap(path, width=None, height=None):
+    """Картинка из кэша; PNG декодируется и масштабируется один раз на размер.
+
+    Пустой QPixmap, если файла нет или он не читается.
+    """
+    key = f"{path}@{width}x{height}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is not None and not pixmap.isNull():
+        return pixmap
+
+    if width is None:
+        pixmap = QPixmap(path)
+    else:
+        pixmap = cached_pixmap(path)
+        if not pixmap.isNull():
+            pixmap = pixmap.scaled(
+                width, height,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+    if not pixmap.isNull():
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+def logo_pixmap(width, height):
+    """Логотип, вписанный в width x height."""
+    return cached_pixmap(LOGO_PATH, width, height)
@@ -0,0 +1,240 @@
+# simulate.py
+"""Партии ИИ против ИИ без интерфейса.
+
+Каждая партия - два случайных флота из fleet.generate_fleet и две
+стратегии из ai.STRATEGIES. Партии раздаются пачками по процессам, а
+результаты печатаются по мере готовности в формате JSONL: строка на
+партию и итоговая строка summary со скоростью, средним числом выстрелов
+до победы, доверительными интервалами доли побед и перцентилями времени
+хода (по корзинам metrics.BUCKETS_MS - процессы присылают гистограммы, а
+не замеры каждого хода).
+
+Пример:
+    python simulate.py --games 1000 -a Обычный -b Сложный
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai import DEFAULT_STRATEGY, STRATEGIES, MonteCarloAI, create_strategy
+from engine import Board, ShotResult
+from fleet import SHIP_TYPES, generate_fleet
+from metrics import Histogram
+
+# Партий в одной задаче процесса
+CHUNK_SIZE = 25
+# z для 95% доверительного интервала
+CONFIDENCE_Z = 1.96
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def play_game(strategies, seed, first=0, latencies=None):
+    """Одна партия: strategies[0] против strategies[1].
+
+    Возвращает номер победителя и число выстрелов каждой стороны. Время
+    каждого хода (мс) записывается в latencies - пару Histogram, если она
+    передана.
+    """
+    rng = random.Random(seed)
+    boards = [Board(), Board()]
+    for board in boards:
+        board.place_fleet(generate_fleet(SHIP_TYPES, rng, board.size))
+    for strategy in strategies:
+        strategy.reset()
+
+    shots = [0, 0]
+    turn = first
+    while True:
+        # Каждая сторона стреляет по полю соперника
+        target = boards[1 - turn]
+        view = target.view()
+        started = time.perf_counter()
+        row, col = strategies[turn].choose(view)
+        if latencies is not None:
+            latencies[turn].record((time.perf_counter() - started) * 1000)
+
+        result = target.fire(row, col)
+        shots[turn] += 1
+        if result == ShotResult.SUNK:
+            target.mark_around_ship(target.ship_mask_at(row, col))
+        strategies[turn].observe(target.view(), row, col,
+                                 result != ShotResult.MISS,
+                                 result == ShotResult.SUNK)
+
+        if not target.ships_left():
+            return turn, shots
+        if result == ShotResult.MISS:
+            turn = 1 - turn
+
+
+def strategy_options(name):
+    """Параметры стратегии внутри процесса симулятора.
+
+    Симулятор уже занимает все ядра своими процессами, поэтому Монте-Карло
+    ИИ получает один процесс выборки вместо os.cpu_count() на каждый.
+    """
+    if issubclass(STRATEGIES[name], MonteCarloAI):
+        return {"workers": 1}
+    return {}
+
+
+def play_chunk(names, seeds, first_game):
+    """Пачка партий в процессе пула; первой ходит сторона с номером партии % 2.
+
+    Возвращает итоги партий и время ходов каждой стороны - гистограммы на
+    всю пачку, а не списки, чтобы память не росла с числом ходов.
+    """
+    strategies = [
+        create_strategy(name, random.Random(seeds[0] ^ side), **strategy_options(name))
+        for side, name in enumerate(names)
+    ]
+    latencies = (Histogram(names[0]), Histogram(names[1]))
+    results = []
+    try:
+        for offset, seed in enumerate(seeds):
+            game = first_game + offset
+            started = time.perf_counter()
+            winner, shots = play_game(strategies, seed, game % 2, latencies)
+            results.append({
+                "game": game,
+                "seed": seed,
+                "first": game % 2,
+                "winner": winner,
+                "shots": shots,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+            })
+    finally:
+        for strategy in strategies:
+            strategy.shutdown()
+    return results, latencies
+
+
+# ===== Итоги =====
+
+def wilson_interval(wins, games, z=CONFIDENCE_Z):
+    """Доверительный интервал Уилсона для доли побед."""
+    if not games:
+        return 0.0, 0.0
+    p = wins / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+class Summary:
+    """Накопление итогов по мере поступления партий."""
+
+    def __init__(self, names):
+        self.names = names
+        self.games = 0
+        self.wins = [0, 0]
+        self.winning_shots = [0, 0]
+        self.latencies = (Histogram(names[0]), Histogram(names[1]))
+
+    def add(self, result):
+        self.games += 1
+        winner = result["winner"]
+        self.wins[winner] += 1
+        self.winning_shots[winner] += result["shots"][winner]
+
+    def add_latencies(self, latencies):
+        """Время ходов пачки партий - по гистограмме на сторону."""
+        for total, chunk in zip(self.latencies, latencies):
+            total.merge(chunk)
+
+    def report(self, elapsed):
+        sides = []
+        for side, name in enumerate(self.names):
+            wins = self.wins[side]
+            low, high = wilson_interval(wins, self.games)
+            latencies = self.latencies[side]
+            sides.append({
+                "strategy": name,
+                "wins": wins,
+                "win_rate": wins / self.games if self.games else 0.0,
+                "win_rate_ci95": [low, high],
+                "avg_shots_to_win": self.winning_shots[side] / wins if wins else None,
+                "latency_ms": dict(
+                    {f"p{q}": latencies.percentile(q) for q in LATENCY_PERCENTILES},
+                    max=latencies.max,
+                    mean=latencies.total / latencies.count if latencies.count else 0.0,
+                ),
+            })
+        return {
+            "type": "summary",
+            "games": self.games,
+            "seconds": elapsed,
+            "games_per_sec": self.games / elapsed if elapsed else 0.0,
+            "sides": sides,
+        }
+
+
+def simulate(names, games, seed=0, workers=None, chunk_size=CHUNK_SIZE,
+             output=sys.stdout, per_game=True):
+    """Прогон партий по процессам с потоковым выводом JSONL."""
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(games)]
+    summary = Summary(names)
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(play_chunk, names, seeds[start:start + chunk_size], start)
+            for start in range(0, games, chunk_size)
+        ]
+        for future in as_completed(futures):
+            results, latencies = future.result()
+            summary.add_latencies(latencies)
+            for result in results:
+                summary.add(result)
+                if per_game:
+                    line = {"type": "game"}
+                    line.update(result)
+                    output.write(json.dumps(line, ensure_ascii=False) + "\n")
+            output.flush()
+
+    report = summary.report(time.perf_counter() - started)
+    output.write(json.dumps(report, ensure_ascii=False) + "\n")
+    output.flush()
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Партии ИИ против ИИ без интерфейса")
+    parser.add_argument("-n", "--games", type=int, default=100, help="число партий")
+    parser.add_argument("-a", "--strategy-a", default=DEFAULT_STRATEGY,
+                        choices=STRATEGIES, help="стратегия первой стороны")
+    parser.add_argument("-b", "--strategy-b", default=DEFAULT_STRATEGY,
+                        choices=STRATEGIES, help="стратегия второй стороны")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора партий")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="партий в одной задаче процесса")
+    parser.add_argument("-o", "--output", help="файл JSONL (по умолчанию - stdout)")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="печатать только итоговую строку")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        simulate(
+            [args.strategy_a, args.strategy_b], args.games, args.seed,
+            args.workers, args.chunk_size, output, not args.summary_only,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
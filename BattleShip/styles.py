@@ -1,90 +1,53 @@
 # styles.py
 
-# Основные стили кнопок
-BUTTON_STYLE = """
-    QPushButton {
-        background-color: #e8f4f8;
-        border: 2px solid #b8d8e8;
-        border-radius: 3px;
-    }
-    QPushButton:hover { 
-        background-color: #d4edf7; 
-        border: 2px solid #7ec8e3;
-    }
-    QPushButton:pressed { 
-        background-color: #b8e2f4; 
-    }
-"""
-
-# Стили для кнопок с кораблями
-SHIP_BUTTON_STYLE = """
-    QPushButton {
-        background-color: #5d8aa8;
-        border: 2px solid #3a6186;
-        border-radius: 3px;
-    }
-    QPushButton:hover { 
-        background-color: #4a7a9a; 
-        border: 2px solid #2a4c6e;
-    }
-"""
-
-# Стили для попаданий
-HIT_BUTTON_STYLE = """
-    QPushButton {
-        background-color: #ff6b6b;
-        border: 2px solid #ff5252;
-        border-radius: 3px;
-        color: #8b0000;
-        font-size: 18px;
-        font-weight: bold;
-    }
-"""
-
-# Стили для промахов
-MISS_BUTTON_STYLE = """
-    QPushButton {
-        background-color: #e8f4f8;
-        border: 2px solid #b8d8e8;
-        border-radius: 3px;
-        color: #666666;
-        font-size: 18px;
-        font-weight: bold;
-    }
-"""
-
-# Стили для анимации огня (3 состояния)
-FIRE_ANIMATION_STYLES = [
-    """
-    QPushButton {
-        background-color: #ff8c00;
-        border: 2px solid #ff4500;
-        border-radius: 3px;
-        color: #8b0000;
-        font-size: 18px;
-        font-weight: bold;
-    }
-    """,
-    """
-    QPushButton {
-        background-color: #ff4500;
-        border: 2px solid #ff0000;
-        border-radius: 3px;
-        color: #8b0000;
-        font-size: 18px;
-        font-weight: bold;
-    }
-    """,
-    """
-    QPushButton {
-        background-color: #ff6347;
-        border: 2px solid #ff8c00;
-        border-radius: 3px;
-        color: #8b0000;
-        font-size: 18px;
-        font-weight: bold;
-    }
-    """
+# Стили клеток игрового поля (рисуются виджетом BoardWidget)
+CELL_STYLES = {
+    # Пустая клетка
+    "empty": {
+        "background": "#e8f4f8",
+        "border": "#b8d8e8",
+        "hover_background": "#d4edf7",
+        "hover_border": "#7ec8e3",
+        "pressed_background": "#b8e2f4",
+    },
+    # Клетка с кораблём
+    "ship": {
+        "background": "#5d8aa8",
+        "border": "#3a6186",
+        "hover_background": "#4a7a9a",
+        "hover_border": "#2a4c6e",
+    },
+    # Попадание
+    "hit": {
+        "background": "#ff6b6b",
+        "border": "#ff5252",
+        "color": "#8b0000",
+        "text": "✕",
+    },
+    # Промах
+    "miss": {
+        "background": "#e8f4f8",
+        "border": "#b8d8e8",
+        "color": "#666666",
+        "text": "•",
+    },
+    # Клетка вокруг потопленного корабля
+    "checked": {
+        "background": "#e8f4f8",
+        "border": "#b8d8e8",
+    },
+    # Потопленный корабль, цвета берутся из FIRE_FRAME_STYLES
+    "fire": {
+        "color": "#8b0000",
+        "text": "✕",
+    },
+}
+
+# Кадры анимации огня (3 состояния)
+FIRE_FRAME_STYLES = [
+    {"background": "#ff8c00", "border": "#ff4500", "color": "#8b0000"},
+    {"background": "#ff4500", "border": "#ff0000", "color": "#8b0000"},
+    {"background": "#ff6347", "border": "#ff8c00", "color": "#8b0000"},
 ]
 
 # Стили для управляющих кнопок
@@ -117,6 +80,13 @@ STATS_BUTTON_STYLE = """
     }
 """
 
+# Единая таблица стилей управляющих кнопок главного окна: вид кнопки
+# задаётся динамическим свойством role, таблица применяется один раз
+CONTROL_BUTTONS_SHEET = (
+    CONTROL_BUTTON_STYLE.replace("QPushButton", 'QPushButton[role="control"]') +
+    STATS_BUTTON_STYLE.replace("QPushButton", 'QPushButton[role="stats"]')
+)
+
 # Стили для групповых рамок (полей)
 FIELD_GROUP_STYLE = """
     QGroupBox { 
@@ -144,8 +114,8 @@ AUTHOR_STYLE = "color: gray; margin-top: 10px; margin-bottom: 5px;"
 # Стиль для основного окна
 MAIN_WINDOW_STYLE = "background-color: #C0C0C0;"
 
-# Стили для заголовков столбцов и строк
-GRID_LABEL_STYLE = "font-weight: bold; color: #003C8F;"
+# Цвет заголовков столбцов и строк
+GRID_LABEL_COLOR = "#003C8F"
 
 # Стили для логотипа
 LOGO_IMAGE_STYLE = "margin: 10px;"
@@ -186,7 +156,8 @@ STATS_TEXT_TEMPLATE = """
 • Процент побед: <b>{win_rate:.1f}%</b><br><br>
 
 <b>Рекорды:</b><br>
-• Самая длинная серия побед: <b>в разработке</b><br>
+• Текущая серия: <b>{current_streak}</b><br>
+• Самая длинная серия побед: <b>{best_win_streak}</b><br>
 • Лучшее время игры: <b>в разработке</b>
 </div>
 """
@@ -220,7 +191,6 @@ SETTINGS_TEXT = """
 <p><b>Настройки в разработке</b></p>
 <p>В будущих версиях здесь можно будет:</p>
 <ul>
-<li>Изменять сложность ИИ</li>
 <li>Настраивать цвета</li>
 <li>Включать/выключать анимации</li>
 <li>Изменять размер поля</li>
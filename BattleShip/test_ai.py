@@ -0,0 +1,89 @@
+# test_ai.py
+"""Стратегии ИИ: расстановки Монте-Карло и ограничение времени хода."""
+import random
+import threading
+import time
+
+import pytest
+
+from ai import (
+    CancelToken, Strategy, TimedStrategy, layout_candidates, sample_layout,
+)
+from bitboard import BOARD_SIZE, popcount, split_ships
+from engine import Board
+from fleet import SHIP_TYPES
+
+FULL_FLEET = [length for length, count in SHIP_TYPES.items() for _ in range(count)]
+
+
+def cell(row, col):
+    return 1 << (row * BOARD_SIZE + col)
+
+
+@pytest.mark.parametrize("open_hits", [
+    cell(4, 4),
+    cell(0, 0),
+    cell(4, 4) | cell(4, 5),
+    cell(2, 7) | cell(3, 7) | cell(4, 7),
+])
+def test_samples_never_contain_sunk_ship(open_hits):
+    candidates, covering = layout_candidates(BOARD_SIZE, 0, open_hits, FULL_FLEET)
+    rng = random.Random(7)
+
+    samples = 0
+    for _ in range(2000):
+        layout = sample_layout(candidates, covering, FULL_FLEET, open_hits, rng)
+        if not layout:
+            continue
+        samples += 1
+        assert layout & open_hits == open_hits
+        ships = split_ships(layout)
+        assert sorted(popcount(ship) for ship in ships) == sorted(FULL_FLEET)
+        # Корабль целиком из раненых клеток уже был бы потоплен
+        assert all(ship & ~open_hits for ship in ships)
+    assert samples
+
+
+class BlockingStrategy(Strategy):
+    """Стратегия, которая ждёт сигнала и записывает порядок вызовов."""
+
+    def reset(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def choose(self, view, token=None, deadline=None):
+        self.calls.append("choose")
+        self.release.wait(5)
+        return view.random_cell(self.rng)
+
+    def observe(self, view, row, col, hit, sunk):
+        self.calls.append(("observe", row, col))
+
+
+def test_observe_waits_for_late_choose():
+    """Пока опоздавший ход считается в фоне, observe не трогает стратегию."""
+    strategy = BlockingStrategy(random.Random(0))
+    timed = TimedStrategy("test", strategy, time_limit=0.01)
+    view = Board().view()
+    token = CancelToken()
+
+    worker = threading.Thread(target=timed.choose, args=(view, token))
+    worker.start()
+    while not strategy.calls:
+        time.sleep(0.001)
+    # Срок вышел: GUI отменяет ход и стреляет сам
+    token.cancel()
+    timed.timed_out(0.01)
+    timed.observe(view, 1, 2, False, False)
+    assert strategy.calls == ["choose"]
+
+    strategy.release.set()
+    worker.join()
+    assert strategy.calls == ["choose"]
+    assert timed.stats()["overruns"] == 1
+    assert timed.stats()["fallbacks"] == 1
+
+    # Отложенный observe доходит до стратегии перед следующим ходом
+    assert timed.choose(view) is not None
+    assert strategy.calls == ["choose", ("observe", 1, 2), "choose"]
+    assert timed.stats()["calls"] == 2
@@ -0,0 +1,184 @@
+# test_db.py
+"""Перевод старой базы (версия 0) на текущую схему."""
+import os
+import random
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import (
+    CREATE_RESULTS_SQL, SCHEMA_VERSION, Database, ResultWriter, apply_outcome,
+    empty_summary,
+)
+from movelog import GameRecord
+
+# История из базы, поставлявшейся с игрой до перехода на сводку
+SHIPPED_RESULTS = [
+    ("win", "2025-11-18 15:47:45"),
+    ("lose", "2025-11-18 15:59:40"),
+]
+
+
+def create_v0_database(path, results):
+    """База версии 0: только таблица results без сводки и записей партий."""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(CREATE_RESULTS_SQL)
+        conn.executemany("INSERT INTO results (outcome, date) VALUES (?, ?)", results)
+    conn.close()
+
+
+def read_results(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT outcome, date FROM results ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def expected_summary(outcomes):
+    summary = empty_summary()
+    for outcome in outcomes:
+        apply_outcome(summary, outcome)
+    return summary
+
+
+def expected_daily(results):
+    daily = Counter()
+    for outcome, date in results:
+        daily[date[:10], outcome] += 1
+    days = sorted({date[:10] for _, date in results}, reverse=True)
+    return [(day, daily[day, "win"], daily[day, "lose"]) for day in days]
+
+
+@pytest.fixture
+def migrate():
+    """Открыть базу через Database и закрыть после теста."""
+    databases = []
+
+    def open_database(path):
+        database = Database(str(path))
+        databases.append(database)
+        return database
+    yield open_database
+    for database in databases:
+        database.close()
+
+
+def check_migrated(database, results):
+    conn = database.connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    assert {"player_fleet", "enemy_fleet", "moves"} <= columns
+
+    assert database.get_summary() == expected_summary(outcome for outcome, _ in results)
+    assert database.get_daily_stats(days=10_000) == expected_daily(results)
+    assert database.get_recorded_games() == []
+
+
+def test_migrates_shipped_database(tmp_path, migrate):
+    """База версии 0, как её поставляла игра, переводится без потерь."""
+    path = tmp_path / "battleship.db"
+    create_v0_database(path, SHIPPED_RESULTS)
+
+    database = migrate(path)
+    check_migrated(database, SHIPPED_RESULTS)
+    assert read_results(path) == SHIPPED_RESULTS
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_migrates_history_with_streaks(tmp_path, migrate, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    # Длинные серии подряд - чтобы проверить текущую и лучшую серии
+    results = []
+    for _ in range(60):
+        outcome = rng.choice(("win", "lose"))
+        for _ in range(rng.randint(1, 6)):
+            played_at = start + timedelta(hours=5 * len(results))
+            results.append((outcome, played_at.strftime("%Y-%m-%d %H:%M:%S")))
+
+    path = tmp_path / "old.db"
+    create_v0_database(path, results)
+
+    check_migrated(migrate(path), results)
+
+
+def test_migrates_empty_database(tmp_path, migrate):
+    check_migrated(migrate(tmp_path / "new.db"), [])
+
+
+def test_new_results_after_migration(tmp_path, migrate):
+    path = tmp_path / "battleship.db"
+    create_v0_database(path, SHIPPED_RESULTS)
+    database = migrate(path)
+
+    record = GameRecord(b"\x01" * 13, b"\x02" * 13, b"\x03\x83")
+    database.add_result("win", record)
+    database.add_result("lose")
+
+    outcomes = [outcome for outcome, _ in SHIPPED_RESULTS] + ["win", "lose"]
+    assert database.get_summary() == expected_summary(outcomes)
+    (result_id, _, outcome), = database.get_recorded_games()
+    assert outcome == "win"
+    assert database.get_game_record(result_id) == record
+    # Повторное открытие не мигрирует базу второй раз
+    database.close()
+    assert migrate(path).get_summary() == expected_summary(outcomes)
+
+
+def test_close_saves_pending_when_database_locked(tmp_path, migrate):
+    """Запертая база не задерживает close() дольше close_timeout."""
+    path = tmp_path / "battleship.db"
+    writer = ResultWriter(migrate(path), retry_delay=0.05, close_timeout=0.3)
+
+    lock = sqlite3.connect(path)
+    lock.execute("BEGIN EXCLUSIVE")
+    try:
+        writer.add_result("win", GameRecord(b"\x01" * 13, b"\x02" * 13, b"\x03\x83"))
+        writer.add_result("lose")
+        started = time.perf_counter()
+        writer.close()
+        elapsed = time.perf_counter() - started
+    finally:
+        lock.rollback()
+        lock.close()
+
+    assert elapsed < writer.close_timeout + writer.retry_delay + 0.2
+    assert writer.stats()["saved_pending"] == 2
+    assert os.path.exists(writer.pending_path)
+
+    # Следующий запуск дописывает отложенные результаты в базу
+    writer = ResultWriter(migrate(path))
+    try:
+        assert writer.get_summary() == expected_summary(["win", "lose"])
+        assert not os.path.exists(writer.pending_path)
+        (result_id, _, outcome), = writer.database.get_recorded_games()
+        assert outcome == "win"
+    finally:
+        writer.close()
+
+
+def test_flush_timeout_with_database_locked(tmp_path, migrate):
+    database = migrate(tmp_path / "battleship.db")
+    writer = ResultWriter(database, retry_delay=0.05)
+
+    lock = sqlite3.connect(database.path)
+    lock.execute("BEGIN EXCLUSIVE")
+    try:
+        writer.add_result("win")
+        started = time.perf_counter()
+        assert not writer.flush(timeout=0.2)
+        assert time.perf_counter() - started < 1
+    finally:
+        lock.rollback()
+        lock.close()
+
+    try:
+        assert writer.flush(timeout=5)
+        assert database.get_summary() == expected_summary(["win"])
+    finally:
+        writer.close()
@@ -0,0 +1,118 @@
+# test_engine.py
+"""Набор непроверенных клеток поля и случайный выбор клетки."""
+import random
+
+import pytest
+
+from ai import BoardView
+from bitboard import BOARD_SIZE, full_mask, iter_bits
+from engine import Board, ShotResult, UnshotCells
+
+
+def check_invariants(unshot, expected):
+    """Массивы классов, таблица позиций и ожидаемое множество согласованы."""
+    size = unshot.size
+    seen = set()
+    for parity_class, cells in enumerate(unshot.classes):
+        for position, index in enumerate(cells):
+            assert unshot.position[index] == position
+            assert unshot.parity_class(index) == parity_class
+            assert (index // size + index % size) % unshot.parity == parity_class
+        assert unshot.count(parity_class) == len(cells)
+        seen.update(cells)
+    assert seen == expected
+    assert len(unshot) == len(expected)
+    for index in range(size * size):
+        assert (index in unshot) == (index in expected)
+        if index not in expected:
+            assert unshot.position[index] == -1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_discard_keeps_invariants(seed):
+    rng = random.Random(seed)
+    unshot = UnshotCells()
+    expected = set(range(BOARD_SIZE * BOARD_SIZE))
+    check_invariants(unshot, expected)
+
+    order = list(expected)
+    rng.shuffle(order)
+    for index in order:
+        unshot.discard(index)
+        expected.discard(index)
+        check_invariants(unshot, expected)
+        # Повторное удаление ничего не меняет
+        unshot.discard(index)
+        check_invariants(unshot, expected)
+
+    assert unshot.random_cell(rng) is None
+    assert unshot.random_cell(rng, parity_class=0) is None
+
+
+def test_discard_mask_and_parity_random_cell():
+    rng = random.Random(1)
+    unshot = UnshotCells()
+    expected = set(range(BOARD_SIZE * BOARD_SIZE))
+    mask = sum(1 << index for index in rng.sample(sorted(expected), 60))
+    unshot.discard_mask(mask)
+    expected -= set(iter_bits(mask))
+    check_invariants(unshot, expected)
+
+    for parity_class in (0, 1):
+        for _ in range(200):
+            row, col = unshot.random_cell(rng, parity_class)
+            assert row * BOARD_SIZE + col in expected
+            assert (row + col) % 2 == parity_class
+
+
+def test_templates_are_not_shared():
+    first, second = UnshotCells(), UnshotCells()
+    first.discard(0)
+    assert 0 in second
+    check_invariants(second, set(range(BOARD_SIZE * BOARD_SIZE)))
+
+
+def test_board_tracks_unshot_cells():
+    """Выстрелы и ореол вокруг потопленных кораблей убирают клетки из набора."""
+    rng = random.Random(3)
+    board = Board()
+    board.place_fleet_random(rng=rng)
+    while board.unshot:
+        row, col = board.unshot.random_cell(rng)
+        if board.fire(row, col) == ShotResult.SUNK:
+            board.mark_around_ship(board.sunk)
+        unchecked = full_mask(board.size) & ~(board.shots | board.halo)
+        check_invariants(board.unshot, set(iter_bits(unchecked)))
+
+
+def test_view_is_a_snapshot():
+    board = Board()
+    view = board.view()
+    board.fire(0, 0)
+    assert view.shots == 0
+    assert not view.is_shot(0, 0)
+    assert board.view().is_shot(0, 0)
+
+
+@pytest.mark.parametrize("shots", [0, 50, 95, 99])
+def test_view_random_cell(shots):
+    rng = random.Random(shots)
+    mask = sum(1 << index for index in rng.sample(range(BOARD_SIZE * BOARD_SIZE), shots))
+    view = BoardView(BOARD_SIZE, mask, 0, 0, 0)
+
+    for parity_class in (None, 0, 1):
+        cells = {
+            (row, col) for row, col in view.unshot_cells()
+            if parity_class is None or (row + col) % 2 == parity_class
+        }
+        for _ in range(50):
+            cell = view.random_cell(rng, parity_class)
+            if not cells:
+                assert cell is None
+                break
+            assert cell in cells
+
+
+def test_view_random_cell_full_board():
+    view = BoardView(BOARD_SIZE, full_mask(BOARD_SIZE), 0, 0, 0)
+    assert view.random_cell() is None
@@ -0,0 +1,37 @@
+# test_movelog.py
+"""Запись партии восстанавливается по флотам без потерь."""
+import random
+
+import pytest
+
+from engine import Game, GameState, ShotResult
+from movelog import AI, HIT, MISS, PLAYER, SUNK, decode_moves
+
+RESULTS = {ShotResult.MISS: MISS, ShotResult.HIT: HIT, ShotResult.SUNK: SUNK}
+
+
+def play_recorded_game(seed):
+    """Партия игрока (случайные выстрелы) против ИИ; возвращает игру и ходы."""
+    rng = random.Random(seed)
+    game = Game(rng=random.Random(seed))
+    game.player.place_fleet_random(rng=rng)
+    game.game_state = GameState.PLAYING
+
+    moves = []
+    while game.game_state == GameState.PLAYING:
+        if game.player_turn:
+            row, col = rng.choice(game.enemy.view().unshot_cells())
+            result = game.player_fire(row, col)
+            moves.append((PLAYER, row, col, RESULTS[result]))
+        else:
+            row, col, result, _ = game.ai_move()
+            moves.append((AI, row, col, RESULTS[result]))
+    game.shutdown()
+    return game, moves
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_decoded_moves_match_engine(seed):
+    """Результаты выстрелов (в том числе потопления) восстанавливаются по флотам."""
+    game, moves = play_recorded_game(seed)
+    assert [tuple(move) for move in decode_moves(game.game_record())] == moves
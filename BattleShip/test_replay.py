@@ -0,0 +1,29 @@
+# test_replay.py
+"""Перемотка записи партии даёт те же поля, что и движок."""
+import pytest
+
+from replay import Replay
+from test_movelog import play_recorded_game
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_replay_final_state_matches_engine(seed):
+    game, _ = play_recorded_game(seed)
+    state = Replay(game.game_record()).state_at(len(game.moves))
+
+    for snapshot, board in ((state.player, game.player), (state.enemy, game.enemy)):
+        assert snapshot.shots == board.shots
+        assert snapshot.hits == board.hits
+        assert snapshot.sunk == board.sunk
+        assert snapshot.halo == board.halo
+
+
+def test_keyframes_match_sequential_replay():
+    """state_at с любого места совпадает с проигрыванием партии с начала."""
+    game, _ = play_recorded_game(0)
+    replay = Replay(game.game_record(), keyframe_interval=7)
+
+    state = replay.state_at(0)
+    for n, move in enumerate(replay.moves, start=1):
+        state = replay.apply(state, move)
+        assert replay.state_at(n) == state
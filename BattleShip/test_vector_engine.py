@@ -0,0 +1,104 @@
+# test_vector_engine.py
+"""VectorBoards ведёт себя так же, как engine.Board."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bitboard import dilate
+from engine import Board, ShotResult
+from vector_engine import HIT, MISS, SUNK, VectorBoards
+
+GAMES = 100
+RESULTS = {ShotResult.MISS: MISS, ShotResult.HIT: HIT, ShotResult.SUNK: SUNK}
+
+
+def to_mask(cells):
+    """Массив bool длины size * size -> битовая маска."""
+    return sum(1 << int(i) for i in np.nonzero(cells)[0])
+
+
+def mirror_boards(vector):
+    """Board с теми же флотами, что в партиях VectorBoards."""
+    boards = []
+    for game in range(vector.n):
+        board = Board(vector.size)
+        for ship, length in enumerate(vector.lengths):
+            mask = to_mask(vector.ship_id[game] == ship)
+            assert bin(mask).count("1") == length
+            board.add_ship(mask, dilate(mask, vector.size))
+        boards.append(board)
+    return boards
+
+
+@pytest.fixture
+def vector():
+    vector = VectorBoards(GAMES, rng=1)
+    vector.place_random_fleets()
+    return vector
+
+
+def test_random_fleets_are_valid(vector):
+    """Флоты полные и корабли не касаются друг друга."""
+    assert (vector.ships_remaining == len(vector.lengths)).all()
+    for board in mirror_boards(vector):
+        for ship in board.ship_masks:
+            others = board.ships & ~ship
+            assert not dilate(ship, board.size) & others
+
+
+def test_can_place_ship_matches_board(vector):
+    boards = mirror_boards(vector)
+    rng = random.Random(0)
+    games = np.arange(GAMES)
+    for length in (1, 2, 3, 4):
+        rows = [rng.randrange(10) for _ in games]
+        cols = [rng.randrange(10) for _ in games]
+        orientations = [rng.choice("HV") for _ in games]
+        got = vector.can_place_ship(games, length, rows, cols, orientations)
+        expected = [boards[g].can_place_ship(rows[g], cols[g], length, orientations[g])
+                    for g in games]
+        assert list(got) == expected
+
+
+def test_fire_and_halo_match_board(vector):
+    """Каждый выстрел, потопление и halo - как у Board, до конца всех партий."""
+    boards = mirror_boards(vector)
+    rng = random.Random(0)
+
+    active = np.nonzero(~vector.game_over)[0]
+    while len(active):
+        # Иногда - повторный выстрел в уже простреленную клетку
+        cells = np.array([
+            rng.randrange(100) if rng.random() < 0.1
+            else rng.choice([i for i in range(100) if not boards[g].checked >> i & 1])
+            for g in active
+        ])
+        results = vector.fire(cells, active)
+        for k, game in enumerate(active):
+            result = boards[game].fire(*divmod(int(cells[k]), 10))
+            assert RESULTS[result] == results[k]
+
+        sunk = results == SUNK
+        if sunk.any():
+            marked = vector.mark_around_ships(active[sunk], cells[sunk])
+            for k, game in enumerate(active[sunk]):
+                ship = boards[game].ship_mask_at(*divmod(int(cells[sunk][k]), 10))
+                assert boards[game].mark_around_ship(ship) == to_mask(marked[k])
+
+        for game in active:
+            board = boards[game]
+            assert board.ships_left() == (not vector.game_over[game])
+            assert board.shots == to_mask(vector.shots[game])
+            assert board.hits == to_mask(vector.hits[game])
+            assert board.sunk == to_mask(vector.sunk[game])
+            assert board.halo == to_mask(vector.halo[game])
+        active = active[~vector.game_over[active]]
+
+
+def test_play_random_finishes_every_game(vector):
+    shots = vector.play_random()
+    assert vector.game_over.all()
+    assert (shots >= vector.lengths.sum()).all()
+    assert (shots <= 100).all()
@@ -0,0 +1,246 @@
+# vector_engine.py
+"""Пакетный движок: тысячи партий одновременно на массивах NumPy.
+
+Поля хранятся массивами формы (N, size * size): номер корабля в клетке
+(ship_id, -1 - пусто), выстрелы, попадания, потопленные палубы и halo.
+Каждый шаг - один выстрел в каждой партии; попадания, потопления (через
+ship_id и счётчики health) и конец партии считаются сразу для всех N
+партий. Правила те же, что у engine.Board: can_place_ship, fire,
+get_ship_cells, mark_around_ship и ships_left.
+
+NumPy нужен только этому модулю (для массовой оценки ИИ); игре и
+simulate.py он не требуется.
+"""
+import numpy as np
+
+from bitboard import BOARD_SIZE, iter_bits
+from fleet import SHIP_TYPES, placement_index
+
+# Результаты выстрела, как у engine.ShotResult
+MISS = 0
+HIT = 1
+SUNK = 2
+
+# Сколько раундов случайных попыток дать кораблю, прежде чем
+# расставлять флот партии заново
+PLACEMENT_ROUNDS = 64
+
+
+def mask_to_array(mask, size=BOARD_SIZE):
+    """Битовая маска bitboard -> массив bool длины size * size."""
+    cells = np.zeros(size * size, dtype=bool)
+    cells[list(iter_bits(mask))] = True
+    return cells
+
+
+def dilate(cells, size=BOARD_SIZE):
+    """Клетки и их 8 соседей для массива масок формы (k, size * size)."""
+    grid = cells.reshape(-1, size, size)
+    padded = np.zeros((grid.shape[0], size + 2, size + 2), dtype=bool)
+    padded[:, 1:-1, 1:-1] = grid
+    result = np.zeros_like(grid)
+    for dr in range(3):
+        for dc in range(3):
+            result |= padded[:, dr:dr + size, dc:dc + size]
+    return result.reshape(cells.shape)
+
+
+class PlacementTable:
+    """placement_index в виде массивов: маски и зоны запрета по длинам."""
+
+    def __init__(self, size=BOARD_SIZE):
+        self.masks = {}
+        self.exclusions = {}
+        self.starts = {}
+        for length, placements in placement_index(size).items():
+            self.masks[length] = np.array(
+                [mask_to_array(p.mask, size) for p in placements])
+            self.exclusions[length] = np.array(
+                [mask_to_array(p.exclusion, size) for p in placements])
+            # (row, col, ориентация) -> номер расстановки
+            self.starts[length] = {
+                (p.row, p.col, p.orientation): i for i, p in enumerate(placements)
+            }
+
+
+class VectorBoards:
+    """N полей с кораблями и выстрелами."""
+
+    def __init__(self, n, size=BOARD_SIZE, ship_types=SHIP_TYPES, rng=None):
+        self.n = n
+        self.size = size
+        self.ship_types = dict(ship_types)
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.table = PlacementTable(size)
+        # Длины кораблей флота по номерам: сначала длинные
+        self.lengths = np.array(sorted(
+            (length for length, count in self.ship_types.items() for _ in range(count)),
+            reverse=True
+        ))
+        self.games = np.arange(n)
+        self.reset()
+
+    def reset(self):
+        """Пустые поля без кораблей."""
+        cells = self.size * self.size
+        self.ship_id = np.full((self.n, cells), -1, dtype=np.int8)
+        self.blocked = np.zeros((self.n, cells), dtype=bool)
+        self.shots = np.zeros((self.n, cells), dtype=bool)
+        self.hits = np.zeros((self.n, cells), dtype=bool)
+        self.sunk = np.zeros((self.n, cells), dtype=bool)
+        self.halo = np.zeros((self.n, cells), dtype=bool)
+        self.health = np.zeros((self.n, len(self.lengths)), dtype=np.int8)
+        self.ships_remaining = np.zeros(self.n, dtype=np.int16)
+        self.shot_count = np.zeros(self.n, dtype=np.int16)
+
+    # ===== Расстановка =====
+
+    def placement_ids(self, length, rows, cols, orientations):
+        """Номера расстановок в PlacementTable; -1 - корабль не влезает."""
+        starts = self.table.starts[length]
+        return np.array([
+            starts.get((r, c, "H" if length == 1 else o), -1)
+            for r, c, o in zip(rows, cols, orientations)
+        ], dtype=np.int32)
+
+    def can_place_ship(self, games, length, rows, cols, orientations):
+        """Векторный can_place_ship: влезает ли корабль в каждой партии."""
+        ids = self.placement_ids(length, rows, cols, orientations)
+        fits = ids >= 0
+        masks = self.table.masks[length][np.where(fits, ids, 0)]
+        return fits & ~(masks & self.blocked[games]).any(axis=1)
+
+    def add_ships(self, games, ship, length, ids):
+        """Постановка корабля номер ship в партиях games."""
+        masks = self.table.masks[length][ids]
+        rows, cols = np.nonzero(masks)
+        self.ship_id[games[rows], cols] = ship
+        self.blocked[games] |= self.table.exclusions[length][ids]
+        self.health[games, ship] = length
+        self.ships_remaining[games] += 1
+
+    def place_random_fleets(self, games=None):
+        """Случайная расстановка всего флота в партиях games (по умолчанию - во всех).
+
+        Каждый корабль ставится случайной допустимой расстановкой с
+        повтором только для партий, где она не подошла. Партии, где
+        корабль так и не встал, расставляются заново.
+        """
+        pending = self.games if games is None else np.asarray(games)
+        while len(pending):
+            self.clear_fleets(pending)
+            failed = np.zeros(len(pending), dtype=bool)
+            for ship, length in enumerate(self.lengths):
+                masks = self.table.masks[length]
+                todo = np.nonzero(~failed)[0]
+                for _ in range(PLACEMENT_ROUNDS):
+                    if not len(todo):
+                        break
+                    ids = self.rng.integers(len(masks), size=len(todo))
+                    games_todo = pending[todo]
+                    ok = ~(masks[ids] & self.blocked[games_todo]).any(axis=1)
+                    self.add_ships(games_todo[ok], ship, length, ids[ok])
+                    todo = todo[~ok]
+                failed[todo] = True
+            pending = pending[failed]
+
+    def clear_fleets(self, games):
+        self.ship_id[games] = -1
+        self.blocked[games] = False
+        self.health[games] = 0
+        self.ships_remaining[games] = 0
+
+    # ===== Выстрелы =====
+
+    @property
+    def checked(self):
+        """Клетки, куда уже нет смысла стрелять."""
+        return self.shots | self.halo
+
+    @property
+    def game_over(self):
+        """Партии, где все корабли потоплены."""
+        return self.ships_remaining == 0
+
+    def fire(self, cells, games=None):
+        """Выстрел по клетке cells[i] в партии games[i]; возвращает MISS/HIT/SUNK."""
+        games = self.games if games is None else np.asarray(games)
+        cells = np.asarray(cells)
+        ships = self.ship_id[games, cells].astype(np.intp)
+        already = self.shots[games, cells]
+        self.shots[games, cells] = True
+        self.shot_count[games] += 1
+
+        hit = ships >= 0
+        ship_index = np.where(hit, ships, 0)
+        new_hit = hit & ~already
+        self.hits[games[new_hit], cells[new_hit]] = True
+        self.health[games[new_hit], ship_index[new_hit]] -= 1
+
+        destroyed = hit & (self.health[games, ship_index] == 0)
+        just_sunk = new_hit & destroyed
+        if just_sunk.any():
+            sunk_games = games[just_sunk]
+            self.ships_remaining[sunk_games] -= 1
+            self.sunk[sunk_games] |= self.ship_cells(sunk_games, cells[just_sunk])
+
+        results = np.full(len(games), MISS, dtype=np.int8)
+        results[hit] = HIT
+        results[destroyed] = SUNK
+        return results
+
+    def ship_cells(self, games, cells):
+        """Векторный get_ship_cells: маски кораблей под клетками, формы (k, size * size)."""
+        ships = self.ship_id[games, cells]
+        return (self.ship_id[games] == ships[:, None]) & (ships[:, None] >= 0)
+
+    def mark_around_ships(self, games, cells):
+        """Векторный mark_around_ship для кораблей под клетками; возвращает
+        маски новых помеченных клеток."""
+        games = np.asarray(games)
+        around = dilate(self.ship_cells(games, np.asarray(cells)), self.size)
+        marked = around & ~self.checked[games]
+        self.halo[games] |= marked
+        return marked
+
+    # ===== Простой противник для оценки =====
+
+    def random_targets(self, games=None):
+        """Случайная ещё не проверенная клетка в каждой партии."""
+        games = self.games if games is None else np.asarray(games)
+        scores = self.rng.random((len(games), self.size * self.size))
+        scores[self.checked[games]] = -1.0
+        return scores.argmax(axis=1)
+
+    def play_random(self, mark_halo=True):
+        """Доигрывание всех партий случайными выстрелами.
+
+        Каждая партия заранее получает случайный порядок клеток и идёт по
+        нему, пропуская проверенные клетки, - так шаг не требует случайных
+        чисел для всего поля. Возвращает число выстрелов в каждой партии.
+        """
+        cells_count = self.size * self.size
+        order = self.rng.permuted(
+            np.tile(np.arange(cells_count, dtype=np.intp), (self.n, 1)), axis=1
+        )
+        position = np.zeros(self.n, dtype=np.intp)
+
+        active = np.nonzero(~self.game_over)[0]
+        while len(active):
+            cells = order[active, position[active]]
+            # Пропуск клеток, уже простреленных или помеченных halo
+            skip = self.shots[active, cells] | self.halo[active, cells]
+            while skip.any():
+                position[active[skip]] += 1
+                cells[skip] = order[active[skip], position[active[skip]]]
+                skip[skip] = (self.shots[active[skip], cells[skip]]
+                              | self.halo[active[skip], cells[skip]])
+            position[active] += 1
+
+            results = self.fire(cells, active)
+            sunk = results == SUNK
+            if sunk.any():
+                if mark_halo:
+                    self.mark_around_ships(active[sunk], cells[sunk])
+                active = active[self.ships_remaining[active] > 0]
+        return self.shot_count.copy()
@@ -0,0 +1,43 @@
+# watchdog.py
+import time
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+
+import metrics
+
+WATCHDOG_INTERVAL = 100
+
+
+class LagWatchdog(QObject):
+    """Задержка цикла событий Qt.
+
+    Таймер тикает каждые interval мс; насколько тик опоздал относительно
+    ожидаемого времени, настолько цикл событий был занят. Опоздания
+    пишутся в гистограмму metrics "ui.event_loop_lag".
+    """
+
+    def __init__(self, interval=WATCHDOG_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.expected = None
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.expected = time.perf_counter() + self.interval / 1000
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.expected = None
+
+    def is_running(self):
+        return self.timer.isActive()
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.expected is not None:
+            metrics.record("ui.event_loop_lag", max(0.0, (now - self.expected) * 1000))
+        self.expected = now + self.interval / 1000
@@ -1,15 +1,28 @@
 # windows.py
-from PyQt6.QtWidgets import *
-from PyQt6.QtCore import *
-from PyQt6.QtGui import *
+import sqlite3
+from PyQt6.QtWidgets import (
+    QAbstractItemView, QCheckBox, QComboBox, QDialog, QFileDialog, QGroupBox,
+    QHBoxLayout, QHeaderView, QLabel, QMessageBox, QPushButton, QSlider,
+    QTableWidget, QTableWidgetItem, QVBoxLayout,
+)
+from PyQt6.QtCore import Qt, QTimer
 from styles import *
+from db import get_database, get_result_writer
+from board_widget import BoardWidget, EMPTY, SHIP, HIT, MISS, CHECKED, FIRE
+from replay import Replay
+from ai import STRATEGIES
+from resources import logo_pixmap
+import metrics
+
+# Сколько окно повторов ждёт запись последних партий, секунды
+REPLAY_FLUSH_TIMEOUT = 0.5
 
 
 class StatsWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Статистика игр")
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 330)
         self.setStyleSheet(DIALOG_STYLE)
 
         self.parent = parent
@@ -25,18 +38,29 @@ class StatsWindow(QDialog):
         layout.addWidget(title)
 
         # Статистика
-        if self.parent:
-            wins, losses = self.parent.get_stats()
+        try:
+            summary = get_result_writer().get_summary()
+            wins, losses = summary["wins"], summary["losses"]
             total_games = wins + losses
             win_rate = (wins / total_games * 100) if total_games > 0 else 0
 
+            streak = summary["current_streak"]
+            if streak > 0:
+                current_streak = f"{streak} (победы)"
+            elif streak < 0:
+                current_streak = f"{-streak} (поражения)"
+            else:
+                current_streak = "нет"
+
             stats_text = STATS_TEXT_TEMPLATE.format(
                 total_games=total_games,
                 wins=wins,
                 losses=losses,
-                win_rate=win_rate
+                win_rate=win_rate,
+                current_streak=current_streak,
+                best_win_streak=summary["best_win_streak"]
             )
-        else:
+        except sqlite3.Error:
             stats_text = "<div>Не удалось загрузить статистику</div>"
 
         stats_label = QLabel(stats_text)
@@ -51,17 +75,27 @@ class StatsWindow(QDialog):
         clear_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
         clear_btn.clicked.connect(self.clear_stats)
 
+        replay_btn = QPushButton("Повторы")
+        replay_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
+        replay_btn.clicked.connect(self.show_replays)
+
         close_btn = QPushButton("Закрыть")
         close_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
         close_btn.clicked.connect(self.close)
 
         button_layout.addWidget(clear_btn)
+        button_layout.addWidget(replay_btn)
         button_layout.addStretch()
         button_layout.addWidget(close_btn)
 
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def show_replays(self):
+        """Показать окно повтора партий."""
+        replay_window = ReplayWindow(self)
+        replay_window.exec()
+
     def clear_stats(self):
         reply = QMessageBox.question(self, "Очистка статистики",
                                      "Вы уверены, что хотите очистить всю статистику?",
@@ -85,17 +119,11 @@ class AboutWindow(QDialog):
         layout = QVBoxLayout()
 
         # Логотип
-        try:
+        logo = logo_pixmap(150, 75)
+        if not logo.isNull():
             logo_label = QLabel()
-            logo_pixmap = QPixmap("assets/Logo.png")
-            if not logo_pixmap.isNull():
-                logo_pixmap = logo_pixmap.scaled(150, 75, Qt.AspectRatioMode.KeepAspectRatio,
-                                                 Qt.TransformationMode.SmoothTransformation)
-                logo_label.setPixmap(logo_pixmap)
-            else:
-                logo_label = QLabel("🌊 МОРСКОЙ БОЙ 🌊")
-                logo_label.setStyleSheet(ABOUT_TITLE_STYLE)
-        except:
+            logo_label.setPixmap(logo)
+        else:
             logo_label = QLabel("🌊 МОРСКОЙ БОЙ 🌊")
             logo_label.setStyleSheet(ABOUT_TITLE_STYLE)
 
@@ -117,10 +145,11 @@ class AboutWindow(QDialog):
 
 
 class SettingsWindow(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, game, parent=None):
         super().__init__(parent)
+        self.game = game
         self.setWindowTitle("Настройки")
-        self.setFixedSize(300, 250)
+        self.setFixedSize(300, 340)
         self.setStyleSheet(DIALOG_STYLE)
         self.init_ui()
 
@@ -132,14 +161,320 @@ class SettingsWindow(QDialog):
         title.setStyleSheet(SETTINGS_TITLE_STYLE)
         layout.addWidget(title)
 
+        # Стратегия ИИ
+        strategy_layout = QHBoxLayout()
+        strategy_layout.addWidget(QLabel("Стратегия ИИ:"))
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.addItems(STRATEGIES)
+        self.strategy_combo.setCurrentText(self.game.strategy)
+        self.strategy_combo.currentTextChanged.connect(self.game.set_strategy)
+        strategy_layout.addWidget(self.strategy_combo)
+        layout.addLayout(strategy_layout)
+
         # Настройки
         settings_label = QLabel(SETTINGS_TEXT)
         settings_label.setStyleSheet(SETTINGS_TEXT_STYLE)
         layout.addWidget(settings_label)
 
+        diagnostics_btn = QPushButton("Диагностика")
+        diagnostics_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
+        diagnostics_btn.clicked.connect(self.show_diagnostics)
+        layout.addWidget(diagnostics_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+        self.setLayout(layout)
+
+    def show_diagnostics(self):
+        """Показать окно с замерами скорости."""
+        diagnostics_window = DiagnosticsWindow(self)
+        diagnostics_window.exec()
+
+
+class DiagnosticsWindow(QDialog):
+    """Замеры горячих путей (metrics.py): время обработчиков, ходов ИИ,
+    запросов к базе и задержка цикла событий."""
+
+    COLUMNS = ["Замер", "Вызовов", "Среднее", "p50", "p95", "p99", "Макс"]
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Диагностика")
+        self.setStyleSheet(DIALOG_STYLE)
+        self.resize(640, 460)
+        self.init_ui()
+        self.refresh()
+
+        # Пока окно открыто, цифры обновляются раз в секунду
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        title = QLabel("🩺 Диагностика")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title.setStyleSheet(SETTINGS_TITLE_STYLE)
+        layout.addWidget(title)
+
+        self.enabled_check = QCheckBox("Собирать замеры")
+        self.enabled_check.setChecked(metrics.is_enabled())
+        self.enabled_check.setEnabled(metrics.ENABLED)
+        self.enabled_check.toggled.connect(metrics.set_enabled)
+        layout.addWidget(self.enabled_check)
+
+        # Время в миллисекундах
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.sources_label = QLabel()
+        self.sources_label.setStyleSheet(SETTINGS_TEXT_STYLE)
+        self.sources_label.setWordWrap(True)
+        layout.addWidget(self.sources_label)
+
+        button_layout = QHBoxLayout()
+        for text, handler in (("Сбросить", self.reset_metrics),
+                              ("Экспорт", self.export_metrics),
+                              ("Закрыть", self.close)):
+            button = QPushButton(text)
+            button.setStyleSheet(CONTROL_BUTTON_STYLE)
+            button.clicked.connect(handler)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        histograms = snapshot["histograms"]
+        self.table.setRowCount(len(histograms))
+        for row, (name, hist) in enumerate(histograms.items()):
+            values = [name, str(hist["count"])] + [
+                f"{hist[key]:.2f}" for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+            ]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+        lines = []
+        for name, stats in snapshot["sources"].items():
+            values = ", ".join(
+                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in stats.items()
+            )
+            lines.append(f"<b>{name}</b>: {values}")
+        self.sources_label.setText("<br>".join(lines))
+
+    def reset_metrics(self):
+        metrics.reset()
+        self.refresh()
+
+    def export_metrics(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт замеров", "battleship_metrics.json", "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            metrics.export(path)
+        except OSError as e:
+            print(f"Ошибка при экспорте замеров: {e}")
+            QMessageBox.warning(self, "Экспорт", f"Не удалось сохранить файл:\n{e}")
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
+
+
+class ReplayWindow(QDialog):
+    # Пауза между ходами при скорости 1x - как у ходов ИИ в игре
+    BASE_INTERVAL = 800
+    SPEEDS = [0.5, 1, 2, 4]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Повтор партий")
+        self.setStyleSheet(DIALOG_STYLE)
+
+        self.replay = None
+        self.position = 0
+        self.speed = 1
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.step)
+
+        self.init_ui()
+        self.load_games()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        title = QLabel("🎬 Повтор партий")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title.setStyleSheet(STATS_TITLE_STYLE)
+        layout.addWidget(title)
+
+        self.game_combo = QComboBox()
+        self.game_combo.currentIndexChanged.connect(self.load_game)
+        layout.addWidget(self.game_combo)
+
+        # Поля - как в главном окне
+        fields_layout = QHBoxLayout()
+        self.player_board = BoardWidget()
+        self.enemy_board = BoardWidget()
+        for title_text, board in (("Поле игрока", self.player_board),
+                                  ("Поле соперника", self.enemy_board)):
+            group_box = QGroupBox(title_text)
+            group_box.setStyleSheet(FIELD_GROUP_STYLE)
+            vbox = QVBoxLayout(group_box)
+            vbox.addWidget(board, alignment=Qt.AlignmentFlag.AlignCenter)
+            fields_layout.addWidget(group_box)
+        layout.addLayout(fields_layout)
+
+        # Управление
+        controls = QHBoxLayout()
+
+        self.play_btn = QPushButton("▶ Играть")
+        self.play_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+
+        self.speed_combo = QComboBox()
+        for speed in self.SPEEDS:
+            self.speed_combo.addItem(f"{speed}x", speed)
+        self.speed_combo.setCurrentIndex(self.SPEEDS.index(1))
+        self.speed_combo.currentIndexChanged.connect(self.set_speed)
+        controls.addWidget(self.speed_combo)
+
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.valueChanged.connect(self.seek)
+        controls.addWidget(self.slider, stretch=1)
+
+        self.move_label = QLabel()
+        controls.addWidget(self.move_label)
+
+        layout.addLayout(controls)
+
         close_btn = QPushButton("Закрыть")
         close_btn.setStyleSheet(CONTROL_BUTTON_STYLE)
         close_btn.clicked.connect(self.close)
         layout.addWidget(close_btn)
 
         self.setLayout(layout)
+
+    def load_games(self):
+        """Список сохранённых партий."""
+        # Результаты из очереди записи тоже должны попасть в список, но
+        # запертая база не должна вешать окно - тогда показываем, что есть
+        if not get_result_writer().flush(timeout=REPLAY_FLUSH_TIMEOUT):
+            print("Очередь записи результатов не успела сброситься")
+        games = get_database().get_recorded_games()
+
+        outcomes = {"win": "победа", "lose": "поражение"}
+        for result_id, date, outcome in games:
+            self.game_combo.addItem(
+                f"#{result_id}  {date}  {outcomes.get(outcome, outcome)}", result_id
+            )
+
+        if not games:
+            self.game_combo.addItem("Нет сохранённых партий")
+            self.set_controls_enabled(False)
+
+    def set_controls_enabled(self, enabled):
+        for widget in (self.game_combo, self.play_btn, self.speed_combo, self.slider):
+            widget.setEnabled(enabled)
+
+    def load_game(self, index):
+        """Загрузка выбранной партии."""
+        result_id = self.game_combo.itemData(index)
+        record = get_database().get_game_record(result_id) if result_id else None
+        if record is None:
+            return
+
+        self.pause()
+        self.replay = Replay(record)
+        self.slider.setRange(0, len(self.replay))
+        self.seek(0)
+
+    def board_states(self, snapshot, fleet):
+        """Состояния клеток поля по снимку."""
+        states = []
+        for index in range(self.player_board.board_size ** 2):
+            bit = 1 << index
+            if snapshot.sunk & bit:
+                states.append(FIRE)
+            elif snapshot.hits & bit:
+                states.append(HIT)
+            elif snapshot.shots & bit:
+                states.append(MISS)
+            elif snapshot.halo & bit:
+                states.append(CHECKED)
+            elif fleet & bit:
+                states.append(SHIP)
+            else:
+                states.append(EMPTY)
+        return states
+
+    def seek(self, position):
+        """Переход к позиции после position ходов."""
+        if self.replay is None:
+            return
+
+        self.position = position
+        state = self.replay.state_at(position)
+        self.player_board.set_states(
+            self.board_states(state.player, self.replay.player_fleet)
+        )
+        self.enemy_board.set_states(
+            self.board_states(state.enemy, self.replay.enemy_fleet)
+        )
+
+        self.slider.blockSignals(True)
+        self.slider.setValue(position)
+        self.slider.blockSignals(False)
+        self.move_label.setText(f"Ход {position} / {len(self.replay)}")
+
+    def step(self):
+        """Следующий ход при воспроизведении."""
+        if self.replay is None or self.position >= len(self.replay):
+            self.pause()
+            return
+        self.seek(self.position + 1)
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.pause()
+        else:
+            self.play()
+
+    def play(self):
+        if self.replay is None:
+            return
+        if self.position >= len(self.replay):
+            self.seek(0)
+        self.timer.start(int(self.BASE_INTERVAL / self.speed))
+        self.play_btn.setText("⏸ Пауза")
+
+    def pause(self):
+        self.timer.stop()
+        self.play_btn.setText("▶ Играть")
+
+    def set_speed(self, index):
+        self.speed = self.speed_combo.itemData(index)
+        if self.timer.isActive():
+            self.timer.start(int(self.BASE_INTERVAL / self.speed))
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)